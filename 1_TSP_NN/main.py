@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import math
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel, QVBoxLayout, QGraphicsView, QGraphicsScene, QGraphicsEllipseItem, QGraphicsLineItem, QTextEdit, QLineEdit, QMessageBox
-from PyQt5.QtGui import QPainter, QPen
-from PyQt5.QtCore import Qt, QRectF
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel, QVBoxLayout, QGraphicsView, QGraphicsScene, QTextEdit, QLineEdit, QMessageBox
+from PyQt5.QtGui import QPainter, QPen, QPainterPath, QPolygonF
+from PyQt5.QtCore import Qt, QRectF, QPointF
+
+# Общие для трёх решателей модули лежат в корне репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from tsp_gui import SolverThread
+from tsp_common import DISABLED_STATS, make_metric
 
 class Node:
     def __init__(self, x, y, index):
@@ -15,32 +22,47 @@ class Node:
     def distance_to(self, node):
         return math.sqrt((self.x - node.x)**2 + (self.y - node.y)**2)
 
+
 class TSPSolver:
-    def __init__(self, nodes):
+    def __init__(self, nodes, stats=None, metric=None):
         self.nodes = nodes
         self.visited = [False] * len(nodes)
+        self.stats = stats or DISABLED_STATS
+        self.metric = make_metric(nodes, metric)
 
     def nearest_neighbor_hamiltonian_cycle(self):
+        path = None
+        for path, distance, iteration in self.nearest_neighbor_steps():
+            pass
+        return path
+
+    def nearest_neighbor_steps(self):
         start_node = self.nodes[0]
-        current_node = start_node
-        self.visited[self.nodes.index(start_node)] = True
-        path = [current_node]
+        current = 0
+        self.visited[current] = True
+        path = [start_node]
+        total_distance = 0
+        yield path, total_distance, 0
 
+        unvisited = np.arange(1, len(self.nodes))
         while len(path) < len(self.nodes):
-            nearest_dist = float('inf')
-            nearest_node = None
-            for i, node in enumerate(self.nodes):
-                if not self.visited[i]:
-                    dist = current_node.distance_to(node)
-                    if dist < nearest_dist:
-                        nearest_dist = dist
-                        nearest_node = node
-            self.visited[self.nodes.index(nearest_node)] = True
-            path.append(nearest_node)
-            current_node = nearest_node
-
+            with self.stats.phase('construction'):
+                self.stats.count('distance_evaluations', len(unvisited))
+                distances = self.metric.row(current, unvisited)
+                k = int(np.argmin(distances))
+                current = int(unvisited[k])
+                unvisited = np.delete(unvisited, k)
+                self.visited[current] = True
+                path.append(self.nodes[current])
+                total_distance += float(distances[k])
+            self.stats.trace('path_length', len(path) - 1, total_distance)
+            yield path, total_distance, len(path) - 1
+
+        total_distance += self.metric.distance(current, 0)
         path.append(start_node)
-        return path
+        self.stats.count('distance_evaluations')
+        self.stats.trace('path_length', len(path) - 1, total_distance)
+        yield path, total_distance, len(path) - 1
 
 class TSPWindow(QWidget):
     def __init__(self):
@@ -50,6 +72,9 @@ class TSPWindow(QWidget):
 
         self.path = []
 
+        self.solver_thread = None
+        self.node_items = []
+
         self.initUI()
         self.draw_graph()
 
@@ -63,6 +88,8 @@ class TSPWindow(QWidget):
         self.view = QGraphicsView()
         self.scene = QGraphicsScene(scene_rect)
         self.view.setScene(self.scene)
+        self.path_item = self.scene.addPath(QPainterPath(), QPen(Qt.red))
+        self.path_item.setZValue(1)
 
         self.label = QLabel('Кликните по полю, чтобы добавить узел, либо введите координаты узла вручную.')
         self.x_input = QLineEdit()
@@ -71,6 +98,9 @@ class TSPWindow(QWidget):
         self.add_button.clicked.connect(self.add_node)
         self.solve_button = QPushButton('Найти кратчайший путь обхода')
         self.solve_button.clicked.connect(self.solve_tsp)
+        self.stop_button = QPushButton('Остановить')
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_solving)
 
         self.info_text = QTextEdit()
         self.info_text.setReadOnly(True)
@@ -84,6 +114,7 @@ class TSPWindow(QWidget):
         layout.addWidget(self.y_input)
         layout.addWidget(self.add_button)
         layout.addWidget(self.solve_button)
+        layout.addWidget(self.stop_button)
         layout.addWidget(self.info_text)
 
         self.setLayout(layout)
@@ -100,7 +131,7 @@ class TSPWindow(QWidget):
             y = float(y_text)
             index = len(self.nodes) + 1
             self.nodes.append(Node(x, y, index))
-            self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue))
+            self.node_items.append(self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue)))
             self.x_input.clear()
             self.y_input.clear()
         except ValueError:
@@ -111,43 +142,69 @@ class TSPWindow(QWidget):
             self.label.setText('Добавьте как минимум 2 узла')
             return
 
-        solver = TSPSolver(self.nodes)
-        self.path = solver.nearest_neighbor_hamiltonian_cycle()
+        if self.solver_thread is not None and self.solver_thread.isRunning():
+            return
 
-        self.display_info()
+        solver = TSPSolver(list(self.nodes))
+        self.solver_thread = SolverThread(solver.nearest_neighbor_steps())
+        self.solver_thread.progress.connect(self.show_progress)
+        self.solver_thread.solved.connect(self.finish_solving)
+        self.solver_thread.failed.connect(self.show_error)
+        self.solve_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.solver_thread.start()
+
+    def show_progress(self, path, distance, iteration):
+        self.path = path
+        self.label.setText(f'Итерация {iteration}, длина пути: {distance:.2f}')
         self.draw_graph()
 
+    def show_error(self, message):
+        self.label.setText(f'Ошибка решения: {message}')
+        QMessageBox.warning(self, 'Ошибка решения', message)
+
+    def finish_solving(self, path, distance, iteration, cancelled):
+        self.path = path
+        self.solve_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        status = 'Остановлено' if cancelled else 'Готово'
+        self.label.setText(f'{status}: итерация {iteration}, длина пути: {distance:.2f}')
+
+        if path:
+            self.display_info()
+        self.draw_graph()
+
+    def stop_solving(self):
+        if self.solver_thread is not None:
+            self.solver_thread.requestInterruption()
+
+    def closeEvent(self, event):
+        if self.solver_thread is not None:
+            self.solver_thread.requestInterruption()
+            self.solver_thread.wait()
+        super().closeEvent(event)
+
     def display_info(self):
-        info = 'Информация:\n'
-        for node in self.nodes:
-            info += f'Узел {node.index}: ({node.x}, {node.y})\n'
-        info += '\nРешение:\n'
+        lines = ['Информация:']
+        lines.extend(f'Узел {node.index}: ({node.x}, {node.y})' for node in self.nodes)
+        lines.append('\nРешение:')
         total_distance = 0
-        for i in range(len(self.path) - 1):
-            node1 = self.path[i]
-            node2 = self.path[i + 1]
+        for i, (node1, node2) in enumerate(zip(self.path, self.path[1:])):
             distance = node1.distance_to(node2)
             total_distance += distance
-            info += f'Ребро {i+1}: Узел {node1.index} -> Узел {node2.index}, Расстояние: {distance:.2f}\n'
-        info += f'\nОбщее расстояние: {total_distance:.2f}'
-        self.info_text.setPlainText(info)
+            lines.append(f'Ребро {i+1}: Узел {node1.index} -> Узел {node2.index}, Расстояние: {distance:.2f}')
+        lines.append(f'\nОбщее расстояние: {total_distance:.2f}')
+        self.info_text.setPlainText('\n'.join(lines))
 
     def draw_graph(self):
-        self.scene.clear()
-
         pen = QPen(Qt.blue)
-        for node in self.nodes:
-            ellipse = QGraphicsEllipseItem(node.x - 5, node.y - 5, 10, 10)
-            ellipse.setPen(pen)
-            self.scene.addItem(ellipse)
-
-        pen = QPen(Qt.red)
-        for i in range(len(self.path) - 1):
-            node1 = self.path[i]
-            node2 = self.path[i + 1]
-            line = QGraphicsLineItem(node1.x, node1.y, node2.x, node2.y)
-            line.setPen(pen)
-            self.scene.addItem(line)
+        for node in self.nodes[len(self.node_items):]:
+            self.node_items.append(self.scene.addEllipse(node.x - 5, node.y - 5, 10, 10, pen))
+
+        tour = QPainterPath()
+        if self.path:
+            tour.addPolygon(QPolygonF([QPointF(node.x, node.y) for node in self.path]))
+        self.path_item.setPath(tour)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -158,7 +215,7 @@ class TSPWindow(QWidget):
             y = scene_pos.y()
             index = len(self.nodes) + 1
             self.nodes.append(Node(x, y, index))
-            self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue))
+            self.node_items.append(self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue)))
 
 
 if __name__ == '__main__':
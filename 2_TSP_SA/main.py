@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import math
-import random
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel, QVBoxLayout, QGraphicsView, QGraphicsScene, QGraphicsEllipseItem, QGraphicsLineItem, QTextEdit, QLineEdit, QMessageBox
-from PyQt5.QtGui import QPen
-from PyQt5.QtCore import Qt, QRectF
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel, QVBoxLayout, QGraphicsView, QGraphicsScene, QTextEdit, QLineEdit, QMessageBox
+from PyQt5.QtGui import QPen, QPainterPath, QPolygonF
+from PyQt5.QtCore import Qt, QRectF, QPointF
+
+# Общие для трёх решателей модули лежат в корне репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from tsp_gui import SolverThread
+from tsp_common import DISABLED_STATS, construct_tour, make_metric
 
 class Node:
     def __init__(self, x, y, index):
@@ -16,50 +22,95 @@ class Node:
     def distance_to(self, node):
         return math.sqrt((self.x - node.x)**2 + (self.y - node.y)**2)
 
+
 class TSPSolver:
-    def __init__(self, nodes):
+    RANDOM_BLOCK = 4096
+
+    def __init__(self, nodes, stats=None, seed=None, construction='random', metric=None):
         self.nodes = nodes
+        self.metric = make_metric(nodes, metric)
+        self.positions = {node: k for k, node in enumerate(nodes)}
+        self.construction = construction
         self.num_nodes = len(nodes)
+        self.stats = stats or DISABLED_STATS
+        self.rng = np.random.default_rng(seed)
         self.initial_temperature = 1000.0
         self.cooling_rate = 0.95
         self.num_iterations = 1000
 
     def simulated_annealing(self):
-        current_solution = self.initial_solution()
+        best_solution = None
+        for best_solution, best_energy, iteration in self.simulated_annealing_steps():
+            pass
+        return best_solution
+
+    def simulated_annealing_steps(self):
+        stats = self.stats
+        with stats.phase('construction'):
+            current_solution = self.initial_solution()
         best_solution = current_solution[:]
-        current_energy = self.calculate_path_distance(current_solution)
+        with stats.phase('evaluation'):
+            current_energy = self.calculate_path_distance(current_solution)
         best_energy = current_energy
+        stats.trace('best_length', 0, best_energy)
+        yield best_solution, best_energy, 0
 
         temperature = self.initial_temperature
-        for _ in range(self.num_iterations):
-            new_solution = self.get_neighbor_solution(current_solution)
-            new_energy = self.calculate_path_distance(new_solution)
+        for iteration in range(1, self.num_iterations + 1):
+            draw = (iteration - 1) % self.RANDOM_BLOCK
+            if draw == 0:
+                thresholds, swaps = self.draw_random_block(min(self.RANDOM_BLOCK, self.num_iterations - iteration + 1))
+
+            with stats.phase('neighbor'):
+                new_solution = self.get_neighbor_solution(current_solution, *swaps[draw])
+            with stats.phase('evaluation'):
+                new_energy = self.calculate_path_distance(new_solution)
 
             delta_energy = new_energy - current_energy
-            if delta_energy < 0 or random.random() < math.exp(-delta_energy / temperature):
+            if delta_energy < 0 or thresholds[draw] < math.exp(-delta_energy / temperature):
                 current_solution = new_solution[:]
                 current_energy = new_energy
+                stats.count('accepted')
 
                 if new_energy < best_energy:
                     best_solution = new_solution[:]
                     best_energy = new_energy
+            else:
+                stats.count('rejected')
 
+            stats.trace('temperature', iteration, temperature)
+            stats.trace('current_length', iteration, current_energy)
+            stats.trace('best_length', iteration, best_energy)
             temperature *= self.cooling_rate
+            yield best_solution, best_energy, iteration
 
-        return best_solution
-
+    # Случайная перестановка или обход, построенный одной из эвристик CONSTRUCTIONS
     def initial_solution(self):
-        return random.sample(self.nodes, len(self.nodes))
-
-        index1, index2 = random.sample(range(self.num_nodes), 2)
+        if self.construction != 'random':
+            return construct_tour(self.nodes, self.construction)
+        return [self.nodes[i] for i in self.rng.permutation(self.num_nodes)]
+
+    # Пороги принятия и пары переставляемых узлов генерируются сразу блоком
+    def draw_random_block(self, size):
+        thresholds = self.rng.random(size).tolist()
+        first = self.rng.integers(self.num_nodes, size=size)
+        second = self.rng.integers(self.num_nodes - 1, size=size)
+        second += second >= first
+        return thresholds, list(zip(first.tolist(), second.tolist()))
+
+    def get_neighbor_solution(self, solution, index1, index2):
+        new_solution = solution[:]
         new_solution[index1], new_solution[index2] = new_solution[index2], new_solution[index1]
         return new_solution
 
     def calculate_path_distance(self, solution):
-        distance = 0
-        for i in range(self.num_nodes):
-            distance += solution[i].distance_to(solution[(i + 1) % self.num_nodes])
-        return distance
+        self.stats.count('distance_evaluations', self.num_nodes)
+        return self.metric.cycle_length([self.positions[node] for node in solution])
+
+# Решатель кластера для tsp_common.DecompositionSolver: отжиг с жадным начальным обходом
+def annealing_cycle(coords, seed):
+    nodes = [Node(x, y, i) for i, (x, y) in enumerate(coords.tolist())]
+    return [node.index for node in TSPSolver(nodes, seed=seed, construction='greedy').simulated_annealing()]
 
 class TSPWindow(QWidget):
     def __init__(self):
@@ -68,6 +119,9 @@ class TSPWindow(QWidget):
         self.nodes = []
         self.path = []
 
+        self.solver_thread = None
+        self.node_items = []
+
         self.initUI()
         self.draw_graph()
 
@@ -81,6 +135,8 @@ class TSPWindow(QWidget):
         self.view = QGraphicsView()
         self.scene = QGraphicsScene(scene_rect)
         self.view.setScene(self.scene)
+        self.path_item = self.scene.addPath(QPainterPath(), QPen(Qt.red))
+        self.path_item.setZValue(1)
 
         self.label = QLabel('Кликните по полю, чтобы добавить узел, либо введите координаты узла вручную.')
         self.x_input = QLineEdit()
@@ -89,6 +145,9 @@ class TSPWindow(QWidget):
         self.add_button.clicked.connect(self.add_node)
         self.solve_button = QPushButton('Найти кратчайший путь обхода')
         self.solve_button.clicked.connect(self.solve_tsp)
+        self.stop_button = QPushButton('Остановить')
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_solving)
 
         self.info_text = QTextEdit()
         self.info_text.setReadOnly(True)
@@ -102,6 +161,7 @@ class TSPWindow(QWidget):
         layout.addWidget(self.y_input)
         layout.addWidget(self.add_button)
         layout.addWidget(self.solve_button)
+        layout.addWidget(self.stop_button)
         layout.addWidget(self.info_text)
 
         self.setLayout(layout)
@@ -118,7 +178,7 @@ class TSPWindow(QWidget):
             y = float(y_text)
             index = len(self.nodes) + 1
             self.nodes.append(Node(x, y, index))
-            self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue))
+            self.node_items.append(self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue)))
             self.x_input.clear()
             self.y_input.clear()
         except ValueError:
@@ -129,43 +189,70 @@ class TSPWindow(QWidget):
             self.label.setText('Добавьте как минимум 2 узла')
             return
 
-        solver = TSPSolver(self.nodes)
-        self.path = solver.simulated_annealing()
+        if self.solver_thread is not None and self.solver_thread.isRunning():
+            return
+
+        solver = TSPSolver(list(self.nodes))
+        self.solver_thread = SolverThread(solver.simulated_annealing_steps())
+        self.solver_thread.progress.connect(self.show_progress)
+        self.solver_thread.solved.connect(self.finish_solving)
+        self.solver_thread.failed.connect(self.show_error)
+        self.solve_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.solver_thread.start()
+
+    def show_progress(self, path, distance, iteration):
+        self.path = path
+        self.label.setText(f'Итерация {iteration}, длина пути: {distance:.2f}')
+        self.draw_graph()
+
+    def show_error(self, message):
+        self.label.setText(f'Ошибка решения: {message}')
+        QMessageBox.warning(self, 'Ошибка решения', message)
 
-        self.display_info()
+    def finish_solving(self, path, distance, iteration, cancelled):
+        self.path = path
+        self.solve_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        status = 'Остановлено' if cancelled else 'Готово'
+        self.label.setText(f'{status}: итерация {iteration}, длина пути: {distance:.2f}')
+
+        if path:
+            self.display_info()
         self.draw_graph()
 
+    def stop_solving(self):
+        if self.solver_thread is not None:
+            self.solver_thread.requestInterruption()
+
+    def closeEvent(self, event):
+        if self.solver_thread is not None:
+            self.solver_thread.requestInterruption()
+            self.solver_thread.wait()
+        super().closeEvent(event)
+
     def display_info(self):
-        info = 'Информация:\n'
-        for node in self.nodes:
-            info += f'Узел {node.index}: ({node.x}, {node.y})\n'
-        info += '\nРешение:\n'
+        lines = ['Информация:']
+        lines.extend(f'Узел {node.index}: ({node.x}, {node.y})' for node in self.nodes)
+        lines.append('\nРешение:')
         total_distance = 0
-        for i in range(len(self.path)):
-            node1 = self.path[i]
-            node2 = self.path[(i + 1) % len(self.path)]
+        for i, (node1, node2) in enumerate(zip(self.path, self.path[1:] + self.path[:1])):
             distance = node1.distance_to(node2)
             total_distance += distance
-            info += f'Ребро {i+1}: Узел {node1.index} -> Узел {node2.index}, Расстояние: {distance:.2f}\n'
-        info += f'\nОбщее расстояние: {total_distance:.2f}'
-        self.info_text.setPlainText(info)
+            lines.append(f'Ребро {i+1}: Узел {node1.index} -> Узел {node2.index}, Расстояние: {distance:.2f}')
+        lines.append(f'\nОбщее расстояние: {total_distance:.2f}')
+        self.info_text.setPlainText('\n'.join(lines))
 
     def draw_graph(self):
-        self.scene.clear()
-
         pen = QPen(Qt.blue)
-        for node in self.nodes:
-            ellipse = QGraphicsEllipseItem(node.x - 5, node.y - 5, 10, 10)
-            ellipse.setPen(pen)
-            self.scene.addItem(ellipse)
-
-        pen = QPen(Qt.red)
-        for i in range(len(self.path)):
-            node1 = self.path[i]
-            node2 = self.path[(i + 1) % len(self.path)]
-            line = QGraphicsLineItem(node1.x, node1.y, node2.x, node2.y)
-            line.setPen(pen)
-            self.scene.addItem(line)
+        for node in self.nodes[len(self.node_items):]:
+            self.node_items.append(self.scene.addEllipse(node.x - 5, node.y - 5, 10, 10, pen))
+
+        tour = QPainterPath()
+        if self.path:
+            tour.addPolygon(QPolygonF([QPointF(node.x, node.y) for node in self.path]))
+            tour.closeSubpath()
+        self.path_item.setPath(tour)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -176,7 +263,7 @@ class TSPWindow(QWidget):
             y = scene_pos.y()
             index = len(self.nodes) + 1
             self.nodes.append(Node(x, y, index))
-            self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue))
+            self.node_items.append(self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue)))
 
 
 if __name__ == '__main__':
@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import math
-import random
+import time
 import numpy as np
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel, QVBoxLayout, QGraphicsView, QGraphicsScene, QGraphicsEllipseItem, QGraphicsLineItem, QTextEdit, QLineEdit, QMessageBox
-from PyQt5.QtGui import QPainter, QPen
-from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QLabel, QVBoxLayout, QGraphicsView, QGraphicsScene, QTextEdit, QLineEdit, QMessageBox
+from PyQt5.QtGui import QPainter, QPen, QPainterPath, QPolygonF
+from PyQt5.QtCore import Qt, QRectF, QPointF
+
+# Общие для трёх решателей модули лежат в корне репозитория
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from tsp_gui import SolverThread
+from tsp_common import (DISABLED_STATS, construct_tour, candidate_neighbors, EuclideanMetric, ManhattanMetric,
+                        make_metric, UnvisitedGrid)
 
 # Класс для представления узла (города)
 class Node:
@@ -19,9 +26,96 @@ class Node:
     def distance_to(self, node):
         return math.sqrt((self.x - node.x) ** 2 + (self.y - node.y) ** 2)
 
+
+# Списки кандидатов для произвольной метрики: для евклидовой — быстрые
+# приближённые соседи по координатам, иначе k ближайших по строкам метрики
+def metric_candidates(nodes, metric, k):
+    if type(metric) is EuclideanMetric:
+        return candidate_neighbors(metric.coords, k)
+    n = len(nodes)
+    k = min(k, n - 1)
+    everyone = np.arange(n)
+    candidates = np.empty((n, k), dtype=np.int64)
+    for i in range(n):
+        row = metric.row(i, everyone).copy()
+        row[i] = np.inf
+        nearest = np.argpartition(row, k - 1)[:k]
+        candidates[i] = nearest[np.argsort(row[nearest])]
+    return candidates
+
+# Плотное хранение феромонов: матрица n x n, испарение затрагивает каждую ячейку
+class DensePheromones:
+    def __init__(self, n, evaporation_rate, initial=1.0):
+        self.values = np.full((n, n), initial)
+        self.evaporation_rate = evaporation_rate
+
+    def edge(self, i, j):
+        return self.values[i][j]
+
+    def deposit(self, i, j, amount):
+        self.values[i][j] += amount
+
+    def evaporate(self):
+        self.values *= 1 - self.evaporation_rate
+
+    # Хранимые направленные рёбра (все, кроме петель) и их текущие значения в том же порядке
+    def edges(self):
+        return np.nonzero(~np.eye(len(self.values), dtype=bool))
+
+    def edge_values(self):
+        return self.values[~np.eye(len(self.values), dtype=bool)]
+
+# Разреженное хранение феромонов только на рёбрах списков кандидатов (массив n x k).
+# Испарение ленивое: хранится значение на момент последнего изменения и номер
+# поколения, текущее значение равно value * keep ** (generation - stamp).
+# Все остальные рёбра имеют общее значение initial * keep ** generation,
+# отложение феромона на них не сохраняется.
+class SparsePheromones:
+    def __init__(self, candidates, evaporation_rate, initial=1.0):
+        self.candidates = candidates
+        self.values = np.full(candidates.shape, initial)
+        self.stamps = np.zeros(candidates.shape, dtype=np.int64)
+        self.initial = initial
+        self.keep = 1 - evaporation_rate
+        self.generation = 0
+        self.slots = [{j: slot for slot, j in enumerate(row)} for row in candidates.tolist()]
+
+    def default(self):
+        return self.initial * self.keep ** self.generation
+
+    # Текущие значения на всех рёбрах-кандидатах узла i
+    def row(self, i):
+        return self.values[i] * self.keep ** (self.generation - self.stamps[i])
+
+    def edge(self, i, j):
+        slot = self.slots[i].get(j)
+        if slot is None:
+            return self.default()
+        return self.values[i, slot] * self.keep ** (self.generation - self.stamps[i, slot])
+
+    def deposit(self, i, j, amount):
+        slot = self.slots[i].get(j)
+        if slot is not None:
+            self.values[i, slot] = self.edge(i, j) + amount
+            self.stamps[i, slot] = self.generation
+
+    def evaporate(self):
+        self.generation += 1
+
+    # Хранимые направленные рёбра (списки кандидатов) и их текущие значения
+    def edges(self):
+        n, k = self.candidates.shape
+        return np.repeat(np.arange(n), k), self.candidates.ravel()
+
+    def edge_values(self):
+        return (self.values * self.keep ** (self.generation - self.stamps)).ravel()
+
 # Класс для алгоритма муравьиной колонии
 class AntColony:
-    def __init__(self, nodes, ant_count=10, generations=100, alpha=0.9, beta=3, evaporation_rate=0.5, q0=0.9):
+    def __init__(self, nodes, ant_count=10, generations=100, alpha=0.9, beta=3, evaporation_rate=0.5, q0=0.9, stats=None, seed=None,
+                 construction=None, construction_bias=1.0, pheromone_backend='dense', candidate_count=10,
+                 metric=None, stagnation_generations=None, min_branching_factor=None, branching_lambda=0.05,
+                 target_length=None, time_limit=None, restart_on_stagnation=False, max_restarts=3):
         self.nodes = nodes
         self.ant_count = ant_count
         self.generations = generations
@@ -29,78 +123,276 @@ class AntColony:
         self.beta = beta
         self.evaporation_rate = evaporation_rate
         self.q0 = q0
-        self.pheromones = np.ones((len(nodes), len(nodes)))  # Инициализация феромонов
+        self.metric = make_metric(nodes, metric)  # Расстояния: имя из METRICS или объект метрики
+
+        # Инициализация феромонов: плотная матрица или только рёбра списков кандидатов
+        self.pheromone_backend = pheromone_backend
+        if pheromone_backend == 'sparse':
+            self.candidates = metric_candidates(nodes, self.metric, candidate_count)
+            if type(self.metric) in (EuclideanMetric, ManhattanMetric):
+                self.unvisited = UnvisitedGrid(self.metric.coords)
+            else:
+                self.unvisited = UnvisitedGrid(size=len(nodes))
+            self.candidate_distances = self.metric.pairs(np.repeat(np.arange(len(nodes)), self.candidates.shape[1]),
+                                                         self.candidates.ravel()).reshape(self.candidates.shape)
+        self.pheromones = self.initial_pheromones()
+
+        # Критерии досрочной остановки (None — критерий не используется):
+        # нет улучшения stagnation_generations поколений, коэффициент ветвления
+        # (см. branching_factor) упал до min_branching_factor, найден цикл не
+        # длиннее target_length, с начала запуска прошло time_limit секунд.
+        # При restart_on_stagnation застой и схождение сбрасывают феромоны
+        # (не более max_restarts раз) вместо остановки.
+        self.stagnation_generations = stagnation_generations
+        self.min_branching_factor = min_branching_factor
+        self.branching_lambda = branching_lambda
+        self.target_length = target_length
+        self.time_limit = time_limit
+        self.restart_on_stagnation = restart_on_stagnation
+        self.max_restarts = max_restarts
+        self.stop_reason = None  # Причина остановки последнего запуска
+        self._branching_layout = None
+        self.stats = stats or DISABLED_STATS  # Сбор статистики, по умолчанию выключен
+        self.rng = np.random.default_rng(seed)  # Собственный генератор: запуски с одним seed воспроизводимы
+        self.construction = construction  # Эвристика из CONSTRUCTIONS для начального смещения феромонов
+        self.construction_bias = construction_bias
+
+    def initial_pheromones(self):
+        if self.pheromone_backend == 'sparse':
+            return SparsePheromones(self.candidates, self.evaporation_rate)
+        return DensePheromones(len(self.nodes), self.evaporation_rate)
+
+    # Усиление феромонов на рёбрах начального обхода в обоих направлениях
+    def bias_pheromones(self, cycle):
+        for node1, node2 in zip(cycle, cycle[1:] + cycle[:1]):
+            self.pheromones.deposit(node1.index, node2.index, self.construction_bias)
+            self.pheromones.deposit(node2.index, node1.index, self.construction_bias)
+
+    # λ-коэффициент ветвления по весам выбора муравьёв tau^alpha * eta^beta.
+    # Вес неориентированного ребра — больший из весов двух его направлений,
+    # для узла считаются рёбра с весом не ниже min + lam * (max - min) по его
+    # рёбрам (рёбра вне списков кандидатов муравьи не выбирают, их вес 0).
+    # Пока выбор определяют расстояния, значение заметно больше 2 (около 5–6
+    # на случайных точках); около 2 и ниже — муравьи почти всегда идут по
+    # соседям одного и того же цикла, колония сошлась.
+    def branching_factor(self, lam=0.05):
+        if self._branching_layout is None:
+            self._branching_layout = self._make_branching_layout()
+        eta, order, starts, ends_order, ends_starts, degree, partial = self._branching_layout
+        weights = self.pheromones.edge_values() ** self.alpha * eta
+        pair_weights = np.maximum.reduceat(weights[order], starts)
+        values = np.concatenate([pair_weights, pair_weights])[ends_order]
+        low = np.minimum.reduceat(values, ends_starts)
+        low[partial] = 0.0
+        high = np.maximum.reduceat(values, ends_starts)
+        threshold = np.repeat(low + lam * (high - low), degree)
+        return float(np.add.reduceat((values >= threshold).astype(np.int64), ends_starts).mean())
+
+    # Группировка хранимых рёбер по неориентированным парам и по узлам; не меняется при перезапусках
+    def _make_branching_layout(self):
+        n = len(self.nodes)
+        u, v = self.pheromones.edges()
+        eta = (1 / self.metric.pairs(u, v)) ** self.beta
+        keys = np.minimum(u, v) * n + np.maximum(u, v)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        pairs = sorted_keys[starts]
+        ends = np.concatenate([pairs // n, pairs % n])
+        ends_order = np.argsort(ends, kind='stable')
+        ends_starts = np.flatnonzero(np.r_[True, np.diff(ends[ends_order]) != 0])
+        degree = np.diff(np.r_[ends_starts, len(ends)])
+        return eta, order, starts, ends_order, ends_starts, degree, degree < n - 1
+
+    # Цель или ограничение по времени, если достигнуто
+    def reached_limit(self, best_distance, started):
+        if self.target_length is not None and best_distance <= self.target_length:
+            return 'target'
+        if self.time_limit is not None and time.monotonic() - started >= self.time_limit:
+            return 'deadline'
+        return None
 
     # Метод оптимизации для поиска оптимального маршрута
     def optimize(self):
         best_cycle = None
-        best_distance = float('inf')
+        for best_cycle, best_distance, iteration in self.optimize_steps():
+            pass
+        return best_cycle
 
+    # Пошаговая оптимизация: после каждого муравья отдаёт лучший найденный цикл,
+    # его длину и номер итерации, что позволяет показывать промежуточный результат
+    def optimize_steps(self):
+        # Закрытие генератора (остановка из интерфейса) отмечается как отмена
+        try:
+            yield from self._optimize_steps()
+        except GeneratorExit:
+            self.stop_reason = 'cancelled'
+            raise
+
+    def _optimize_steps(self):
+        started = time.monotonic()
+        self.stop_reason = 'generations'
+        best_cycle = None
+        best_distance = float('inf')
+        stats = self.stats
+
+        # Начальный обход эвристикой: усиливаем феромоны на его рёбрах в обоих
+        # направлениях и берём его как первое лучшее решение
+        constructed = None
+        if self.construction is not None:
+            with stats.phase('construction'):
+                constructed = construct_tour(self.nodes, self.construction)
+            best_cycle = constructed
+            best_distance = self.calculate_cycle_distance(best_cycle)
+            self.bias_pheromones(constructed)
+            yield best_cycle, best_distance, 0
+
+            limit = self.reached_limit(best_distance, started)
+            if limit is not None:
+                self.stop_reason = limit
+                return
+
+        last_improvement = 0
+        restarts = 0
         for gen in range(self.generations):
+            generation_best = float('inf')
             for ant_index in range(self.ant_count):
-                cycle = self.ant_tour()
-                distance = self.calculate_cycle_distance(cycle)
+                with stats.phase('construction'):
+                    cycle = self.ant_tour()
+                with stats.phase('evaluation'):
+                    distance = self.calculate_cycle_distance(cycle)
+                generation_best = min(generation_best, distance)
                 if distance < best_distance:
                     best_distance = distance
                     best_cycle = cycle
-            self.update_pheromones(best_cycle)
-
-        return best_cycle
+                    last_improvement = gen
+                yield best_cycle, best_distance, gen * self.ant_count + ant_index + 1
+
+                limit = self.reached_limit(best_distance, started)
+                if limit is not None:
+                    self.stop_reason = limit
+                    return
+
+            with stats.phase('pheromone_update'):
+                self.update_pheromones(best_cycle)
+            stats.trace('generation_best_length', gen, generation_best)
+            stats.trace('best_length', gen, best_distance)
+
+            stagnated = (self.stagnation_generations is not None
+                         and gen - last_improvement >= self.stagnation_generations)
+            collapsed = False
+            if self.min_branching_factor is not None:
+                branching = self.branching_factor(self.branching_lambda)
+                stats.trace('branching_factor', gen, branching)
+                collapsed = branching <= self.min_branching_factor
+
+            if stagnated or collapsed:
+                if self.restart_on_stagnation and restarts < self.max_restarts:
+                    # Перезапуск: феромоны возвращаются к начальным (вместе со смещением
+                    # к начальному обходу), лучший цикл сохраняется
+                    restarts += 1
+                    stats.count('restarts')
+                    self.pheromones = self.initial_pheromones()
+                    if constructed is not None:
+                        self.bias_pheromones(constructed)
+                    last_improvement = gen
+                    continue
+                self.stop_reason = 'stagnation' if stagnated else 'branching'
+                return
 
     # Метод для прохождения муравья по графу (поиск маршрута)
     def ant_tour(self):
-        cycle = [random.choice(self.nodes)]  # Начальный узел
-        remaining_nodes = set(self.nodes) - set(cycle)
+        if self.pheromone_backend == 'sparse':
+            return self.candidate_ant_tour()
+
+        start = int(self.rng.integers(len(self.nodes)))
+        cycle = [self.nodes[start]]  # Начальный узел
+        remaining_nodes = self.nodes[:start] + self.nodes[start + 1:]
+
+        # Случайные числа для всего обхода генерируются одним блоком
+        greedy_draws = self.rng.random(len(remaining_nodes)).tolist()
+        roulette_draws = self.rng.random(len(remaining_nodes)).tolist()
 
-        while remaining_nodes:
-            next_node = self.select_next_node(cycle[-1], remaining_nodes)
-            cycle.append(next_node)
-            remaining_nodes.remove(next_node)
+        for greedy_draw, roulette_draw in zip(greedy_draws, roulette_draws):
+            next_index = self.select_next_node(cycle[-1], remaining_nodes, greedy_draw, roulette_draw)
+            cycle.append(remaining_nodes.pop(next_index))
 
         return cycle
 
-    # Выбор следующего узла для муравья
-    def select_next_node(self, current_node, remaining_nodes):
+    # Обход по спискам кандидатов: выбор только среди непосещённых кандидатов,
+    # а если их не осталось — переход к ближайшему непосещённому узлу через сетку
+    def candidate_ant_tour(self):
+        n = len(self.nodes)
+        start = int(self.rng.integers(n))
+        visited = np.zeros(n, dtype=bool)
+        visited[start] = True
+        tour = [start]
+        self.unvisited.reset()
+        self.unvisited.remove(start)
+
+        greedy_draws = self.rng.random(n - 1).tolist()
+        roulette_draws = self.rng.random(n - 1).tolist()
+
+        for greedy_draw, roulette_draw in zip(greedy_draws, roulette_draws):
+            current = tour[-1]
+            candidates = self.candidates[current]
+            unvisited = ~visited[candidates]
+            attractiveness = (self.pheromones.row(current)[unvisited] ** self.alpha
+                              * (1 / self.candidate_distances[current][unvisited]) ** self.beta)
+            total = attractiveness.sum()
+            if total > 0:
+                if greedy_draw < self.q0:
+                    choice = int(np.argmax(attractiveness))
+                else:
+                    choice = int(np.searchsorted(np.cumsum(attractiveness), roulette_draw * total, side='right'))
+                    choice = min(choice, len(attractiveness) - 1)
+                next_index = int(candidates[unvisited][choice])
+            else:
+                next_index, evaluations = self.unvisited.nearest(current, self.metric)
+                self.stats.count('distance_evaluations', evaluations)
+            visited[next_index] = True
+            self.unvisited.remove(next_index)
+            tour.append(next_index)
+
+        return [self.nodes[i] for i in tour]
+
+    # Выбор следующего узла для муравья, возвращает его позицию в remaining_nodes
+    def select_next_node(self, current_node, remaining_nodes, greedy_draw, roulette_draw):
         probabilities = self.calculate_probabilities(current_node, remaining_nodes)
-        if random.random() < self.q0:
-            next_node_index = np.argmax(probabilities)  # Использование q0 для жадного выбора
-        else:
-            next_node_index = random.choices(range(len(probabilities)), probabilities)[0]
-        return list(remaining_nodes)[next_node_index]
+        if greedy_draw < self.q0:
+            return int(np.argmax(probabilities))  # Использование q0 для жадного выбора
+        # Рулетка: первый узел, на котором накопленная вероятность превысила roulette_draw
+        next_index = int(np.searchsorted(np.cumsum(probabilities), roulette_draw, side='right'))
+        return min(next_index, len(probabilities) - 1)
 
     # Вычисление вероятностей перехода к следующему узлу
     def calculate_probabilities(self, current_node, remaining_nodes):
-        probabilities = []
-        total = 0
-
-        for node in remaining_nodes:
-            pheromone = self.pheromones[current_node.index][node.index]
-            distance = current_node.distance_to(node)
-            attractiveness = pheromone ** self.alpha * (1 / distance) ** self.beta
-            probabilities.append(attractiveness)
-            total += attractiveness
-
-        probabilities = [p / total for p in probabilities]
-        return probabilities
+        self.stats.count('distance_evaluations', len(remaining_nodes))
+        indices = np.array([node.index for node in remaining_nodes])
+        pheromones = self.pheromones.values[current_node.index][indices]
+        distances = self.metric.row(current_node.index, indices)
+        attractiveness = pheromones ** self.alpha * (1 / distances) ** self.beta
+        return attractiveness / attractiveness.sum()
 
     # Обновление уровня феромонов после прохождения муравьев
     def update_pheromones(self, cycle):
-        delta_pheromones = np.zeros((len(self.nodes), len(self.nodes)))
+        amount = 1 / self.calculate_cycle_distance(cycle)
 
+        self.pheromones.evaporate()
         for i in range(len(cycle) - 1):
-            node1 = cycle[i]
-            node2 = cycle[i + 1]
-            delta_pheromones[node1.index][node2.index] += 1 / self.calculate_cycle_distance(cycle)
-
-        for i in range(len(self.nodes)):
-            for j in range(len(self.nodes)):
-                self.pheromones[i][j] = (1 - self.evaporation_rate) * self.pheromones[i][j] + delta_pheromones[i][j]
+            self.pheromones.deposit(cycle[i].index, cycle[i + 1].index, amount)
 
     # Вычисление полной длины цикла
     def calculate_cycle_distance(self, cycle):
-        total_distance = sum(cycle[i].distance_to(cycle[i + 1]) for i in range(len(cycle) - 1))
-        total_distance += cycle[-1].distance_to(cycle[0])
-        return total_distance
+        self.stats.count('distance_evaluations', len(cycle))
+        return self.metric.cycle_length([node.index for node in cycle])
+
+# Независимые воспроизводимые seed для параллельных решателей, полученные из одного seed
+# Решатель кластера для tsp_common.DecompositionSolver: муравьиная колония
+# с жадным начальным обходом; возвращает порядок локальных индексов
+def ant_colony_cycle(coords, seed):
+    nodes = [Node(x, y, i) for i, (x, y) in enumerate(coords.tolist())]
+    return [node.index for node in AntColony(nodes, seed=seed, construction='greedy').optimize()]
 
 # Оконный класс для отображения и взаимодействия
 class TSPWindow(QWidget):
@@ -123,6 +415,9 @@ class TSPWindow(QWidget):
                       Node(150, 150, 12)]
         self.cycle = []  # Цикл (маршрут)
 
+        self.solver_thread = None
+        self.node_items = []
+
         self.initUI()
         self.draw_graph()
 
@@ -136,6 +431,8 @@ class TSPWindow(QWidget):
         self.view = QGraphicsView()
         self.scene = QGraphicsScene(scene_rect)
         self.view.setScene(self.scene)
+        self.path_item = self.scene.addPath(QPainterPath(), QPen(Qt.red))
+        self.path_item.setZValue(1)
 
         self.label = QLabel('Кликните по полю, чтобы добавить узел, либо введите координаты узла вручную.')
         self.x_input = QLineEdit()
@@ -144,6 +441,9 @@ class TSPWindow(QWidget):
         self.add_button.clicked.connect(self.add_node)
         self.solve_button = QPushButton('Найти кратчайший путь обхода')
         self.solve_button.clicked.connect(self.solve_tsp)
+        self.stop_button = QPushButton('Остановить')
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_solving)
 
         self.info_text = QTextEdit()
         self.info_text.setReadOnly(True)
@@ -157,6 +457,7 @@ class TSPWindow(QWidget):
         layout.addWidget(self.y_input)
         layout.addWidget(self.add_button)
         layout.addWidget(self.solve_button)
+        layout.addWidget(self.stop_button)
         layout.addWidget(self.info_text)
 
         self.setLayout(layout)
@@ -174,7 +475,7 @@ class TSPWindow(QWidget):
             y = float(y_text)
             index = len(self.nodes)
             self.nodes.append(Node(x, y, index))
-            self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue))
+            self.node_items.append(self.scene.addEllipse(x - 5, y - 5, 10, 10, QPen(Qt.blue)))
             self.x_input.clear()
             self.y_input.clear()
         except ValueError:
@@ -186,45 +487,74 @@ class TSPWindow(QWidget):
             self.label.setText('Добавьте как минимум 3 узла')
             return
 
-        ant_colony = AntColony(self.nodes)
-        self.cycle = ant_colony.optimize()
+        if self.solver_thread is not None and self.solver_thread.isRunning():
+            return
 
-        self.display_info()
+        ant_colony = AntColony(list(self.nodes))
+        self.solver_thread = SolverThread(ant_colony.optimize_steps())
+        self.solver_thread.progress.connect(self.show_progress)
+        self.solver_thread.solved.connect(self.finish_solving)
+        self.solver_thread.failed.connect(self.show_error)
+        self.solve_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.solver_thread.start()
+
+    # Отрисовка лучшего на данный момент цикла во время решения
+    def show_progress(self, path, distance, iteration):
+        self.cycle = path
+        self.label.setText(f'Итерация {iteration}, длина пути: {distance:.2f}')
         self.draw_graph()
 
+    def show_error(self, message):
+        self.label.setText(f'Ошибка решения: {message}')
+        QMessageBox.warning(self, 'Ошибка решения', message)
+
+    def finish_solving(self, path, distance, iteration, cancelled):
+        self.cycle = path
+        self.solve_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        status = 'Остановлено' if cancelled else 'Готово'
+        self.label.setText(f'{status}: итерация {iteration}, длина пути: {distance:.2f}')
+
+        if path:
+            self.display_info()
+        self.draw_graph()
+
+    # Досрочная остановка решения
+    def stop_solving(self):
+        if self.solver_thread is not None:
+            self.solver_thread.requestInterruption()
+
+    def closeEvent(self, event):
+        if self.solver_thread is not None:
+            self.solver_thread.requestInterruption()
+            self.solver_thread.wait()
+        super().closeEvent(event)
+
     # Вывод информации о решении задачи
     def display_info(self):
-        info = 'Информация:\n'
-        for node in self.nodes:
-            info += f'Узел {node.index}: ({node.x}, {node.y})\n'
-        info += '\nРешение (Гамильтонов цикл):\n'
-        total_distance = sum(node.distance_to(self.cycle[i + 1]) for i, node in enumerate(self.cycle[:-1]))
-        total_distance += self.cycle[-1].distance_to(self.cycle[0])
-        for i in range(len(self.cycle) - 1):
-            node1 = self.cycle[i]
-            node2 = self.cycle[i + 1]
+        lines = ['Информация:']
+        lines.extend(f'Узел {node.index}: ({node.x}, {node.y})' for node in self.nodes)
+        lines.append('\nРешение (Гамильтонов цикл):')
+        total_distance = self.cycle[-1].distance_to(self.cycle[0])
+        for i, (node1, node2) in enumerate(zip(self.cycle, self.cycle[1:])):
             distance = node1.distance_to(node2)
-            info += f'Ребро {i + 1}: Узел {node1.index} -> Узел {node2.index}, Расстояние: {distance:.2f}\n'
-        info += f'\nОбщее расстояние: {total_distance:.2f}'
-        self.info_text.setPlainText(info)
+            total_distance += distance
+            lines.append(f'Ребро {i + 1}: Узел {node1.index} -> Узел {node2.index}, Расстояние: {distance:.2f}')
+        lines.append(f'\nОбщее расстояние: {total_distance:.2f}')
+        self.info_text.setPlainText('\n'.join(lines))
 
     # Отрисовка графа с узлами и маршрутом
     def draw_graph(self):
-        self.scene.clear()
-
         pen = QPen(Qt.blue)
-        for node in self.nodes:
-            ellipse = QGraphicsEllipseItem(node.x - 5, node.y - 5, 10, 10)
-            ellipse.setPen(pen)
-            self.scene.addItem(ellipse)
-
-        pen = QPen(Qt.red)
-        for i in range(len(self.cycle)):
-            node1 = self.cycle[i]
-            node2 = self.cycle[(i + 1) % len(self.cycle)]
-            line = QGraphicsLineItem(node1.x, node1.y, node2.x, node2.y)
-            line.setPen(pen)
-            self.scene.addItem(line)
+        for node in self.nodes[len(self.node_items):]:
+            self.node_items.append(self.scene.addEllipse(node.x - 5, node.y - 5, 10, 10, pen))
+
+        tour = QPainterPath()
+        if self.cycle:
+            tour.addPolygon(QPolygonF([QPointF(node.x, node.y) for node in self.cycle]))
+            tour.closeSubpath()
+        self.path_item.setPath(tour)
 
 # Основная часть программы: создание приложения и окна для решения TSP
 if __name__ == '__main__':
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from main import AntColony, Node
+from tsp_common import SolverStats
+
+
+def random_nodes(count=60, seed=0):
+    points = np.random.default_rng(seed).random((count, 2)) * 1000
+    return [Node(x, y, i) for i, (x, y) in enumerate(points.tolist())]
+
+
+@pytest.mark.parametrize('backend', ['dense', 'sparse'])
+def test_branching_stop_does_not_fire_on_unconverged_colony(backend):
+    stats = SolverStats()
+    colony = AntColony(random_nodes(), generations=5, seed=1, pheromone_backend=backend,
+                       stats=stats, min_branching_factor=2.0)
+    colony.optimize()
+    assert colony.stop_reason == 'generations'
+    assert min(value for _, value in stats.traces['branching_factor']) > 4
+
+
+@pytest.mark.parametrize('backend', ['dense', 'sparse'])
+def test_branching_stop_fires_after_convergence(backend):
+    colony = AntColony(random_nodes(), generations=100, seed=1, pheromone_backend=backend,
+                       min_branching_factor=2.0)
+    colony.optimize()
+    assert colony.stop_reason == 'branching'
+    assert colony.branching_factor() <= 2.0
+
+
+def test_closed_run_is_cancelled():
+    colony = AntColony(random_nodes(), seed=1)
+    steps = colony.optimize_steps()
+    next(steps)
+    steps.close()
+    assert colony.stop_reason == 'cancelled'
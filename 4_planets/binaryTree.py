@@ -3,9 +3,10 @@
 import sys
 import random
 from collections import deque
+from spatial_index import GridIndex
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QSpinBox, QMessageBox
 from PyQt5.QtGui import QPainter, QPen, QFont, QColor
-from PyQt5.QtCore import Qt, QRectF, QPointF
+from PyQt5.QtCore import Qt, QRectF
 
 class Node:
     def __init__(self, value, id):
@@ -24,6 +25,7 @@ class BinaryTree:
             self.root = new_node
         else:
             self._insert_rec(self.root, new_node)
+        return new_node
 
     def _insert_rec(self, current, new_node):
         if new_node.value < current.value:
@@ -95,6 +97,8 @@ class GraphWidget(QWidget):
         self.selected_node = None
         self.distance = 0
         self.highlighted_nodes = set()
+        self.node_positions = {}
+        self.spatial_index = GridIndex(40)
 
         self.setMinimumSize(800, 600)
 
@@ -102,31 +106,20 @@ class GraphWidget(QWidget):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
 
-        if self.binary_tree.root:
-            self._draw_tree(painter, self.binary_tree.root, 400, 50, 200)
-
-    def _draw_tree(self, painter, node, x, y, spacing):
-        if not node:
-            return
-
-        x = int(x)
-        y = int(y)
-        x_left = int(x - spacing)
-        y_left = int(y + 100)
-        x_right = int(x + spacing)
-        y_right = int(y + 100)
-
-        # Draw left subtree
-        if node.left:
-            painter.drawLine(x, y, x_left, y_left)
-            self._draw_tree(painter, node.left, x_left, y_left, spacing / 2)
+        # Draw edges using the cached layout
+        painter.setPen(QPen(Qt.black))
+        for node, (x, y) in self.node_positions.items():
+            for child in (node.left, node.right):
+                if child:
+                    child_x, child_y = self.node_positions[child]
+                    painter.drawLine(x, y, child_x, child_y)
 
-        # Draw right subtree
-        if node.right:
-            painter.drawLine(x, y, x_right, y_right)
-            self._draw_tree(painter, node.right, x_right, y_right, spacing / 2)
+        font = QFont("Arial", 10)
+        painter.setFont(font)
+        for node, (x, y) in self.node_positions.items():
+            self._draw_node(painter, node, x, y)
 
-        # Draw node
+    def _draw_node(self, painter, node, x, y):
         painter.setPen(QPen(Qt.black))
         if self.selected_node and node == self.selected_node:
             painter.setBrush(Qt.blue)  # подсвечиваем выбранный узел синим цветом
@@ -136,18 +129,39 @@ class GraphWidget(QWidget):
             painter.setBrush(Qt.white)
 
         painter.drawEllipse(x - 20, y - 20, 40, 40)
-
-        font = QFont("Arial", 10)
-        painter.setFont(font)
         painter.drawText(QRectF(x - 20, y - 20, 40, 40), Qt.AlignCenter, str(node.value))
 
-    def generate_random_tree(self, num_nodes):
+    def insert_node(self, value, id):
+        node = self.binary_tree.insert(value, id)
+
+        # Existing nodes never move, so only the new node has to be placed:
+        # follow the insertion path from the root, halving the spacing per level
+        current = self.binary_tree.root
+        x, y, spacing = 400, 50, 200
+        while current is not node:
+            if node.value < current.value:
+                current = current.left
+                x = int(x - spacing)
+            else:
+                current = current.right
+                x = int(x + spacing)
+            y += 100
+            spacing /= 2
+
+        self.node_positions[node] = (x, y)
+        self.spatial_index.insert(node, x, y)
+        return node
+
+    def generate_random_tree(self, num_nodes, seed=None):
         self.binary_tree = BinaryTree()
         self.selected_node = None
         self.highlighted_nodes.clear()
+        self.node_positions.clear()
+        self.spatial_index.clear()
 
+        rng = random.Random(seed)
         for i in range(num_nodes):
-            self.binary_tree.insert(random.randint(1, 100), i)
+            self.insert_node(rng.randint(1, 100), i)
 
         self.update()
 
@@ -163,7 +177,7 @@ class GraphWidget(QWidget):
 
     def mousePressEvent(self, event):
         click_pos = event.pos()
-        selected_node = self._find_node_at(self.binary_tree.root, click_pos, QPointF(400, 50), 200)
+        selected_node = self.spatial_index.nearest(click_pos.x(), click_pos.y(), 20)
         if selected_node is not None:
             self.selected_node = selected_node
             self.find_and_highlight_nodes()
@@ -172,28 +186,6 @@ class GraphWidget(QWidget):
             self.highlighted_nodes.clear()
             self.update()
 
-    def _find_node_at(self, node, click_pos, node_pos, spacing):
-        if not node:
-            return None
-
-        node_center = QPointF(node_pos.x(), node_pos.y())
-        click_point = QPointF(click_pos.x(), click_pos.y())
-
-        # Check distance to node center
-        if (click_point - node_center).manhattanLength() <= 20:
-            return node
-
-        # Recursively search in both directions
-        left_result = self._find_node_at(node.left, click_pos, QPointF(node_pos.x() - spacing, node_pos.y() + 100), spacing / 2)
-        if left_result is not None:
-            return left_result
-
-        right_result = self._find_node_at(node.right, click_pos, QPointF(node_pos.x() + spacing, node_pos.y() + 100), spacing / 2)
-        if right_result is not None:
-            return right_result
-
-        return None
-
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
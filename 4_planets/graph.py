@@ -1,15 +1,396 @@
 #!/usr/bin/env python3
 
 import sys
-import random
+import json
+import heapq
+import hashlib
+import numpy as np
 import networkx as nx
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 import matplotlib.pyplot as plt
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from spatial_index import GridIndex
 from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLabel, QSpinBox, QMessageBox
-from PyQt5.QtCore import Qt, QPointF
-from PyQt5.QtGui import QPainter, QPen, QColor, QFont
+from PyQt5.QtCore import Qt, QPointF, QLineF, QRectF, QTimer
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QPixmap, QTransform, QPolygonF
+
+
+# Компактное представление графа в формате CSR для быстрых запросов Дейкстры
+class CSRGraph:
+    def __init__(self, nodes, indptr, indices, weights):
+        self.nodes = nodes
+        self.node_index = {node: i for i, node in enumerate(nodes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+    @classmethod
+    def from_networkx(cls, graph):
+        nodes = list(graph.nodes())
+        node_index = {node: i for i, node in enumerate(nodes)}
+        degrees = np.fromiter((graph.degree(node) for node in nodes), dtype=np.int64, count=len(nodes))
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        indices = np.empty(indptr[-1], dtype=np.int64)
+        weights = np.empty(indptr[-1], dtype=np.float64)
+
+        pos = 0
+        for node in nodes:
+            for neighbor, data in graph.adj[node].items():
+                indices[pos] = node_index[neighbor]
+                weights[pos] = data.get("weight", 1)
+                pos += 1
+
+        return cls(nodes, indptr, indices, weights)
+
+    # Построение сразу из массивов неориентированных рёбер (u, v, weight), без networkx
+    @classmethod
+    def from_edges(cls, num_nodes, u, v, weights):
+        sources = np.concatenate([u, v])
+        targets = np.concatenate([v, u])
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+        edge_weights = np.concatenate([weights, weights]).astype(np.float64)
+        return cls(list(range(num_nodes)), indptr, targets[order].astype(np.int64), edge_weights[order])
+
+    # Отпечаток графа, по которому проверяется, что сохранённый индекс ему соответствует
+    def fingerprint(self):
+        digest = hashlib.sha1()
+        for array in (self.indptr, self.indices, self.weights):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    # Дейкстра сразу из нескольких источников: расстояние до ближайшего из них
+    def dijkstra(self, sources, cutoff):
+        return _csr_dijkstra(self.indptr, self.indices, self.weights,
+                             [self.node_index[node] for node in sources], cutoff)
+
+    def nodes_within_distance(self, sources, cutoff):
+        dist = self.dijkstra(sources, cutoff)
+        return [self.nodes[i] for i in np.flatnonzero(dist <= cutoff)]
+
+    # Пакетный запрос: для каждого источника отдельно, работа делится между процессами
+    def batch_nodes_within_distance(self, sources, cutoff, processes=None, chunksize=64):
+        sources = list(sources)
+        source_indices = [self.node_index[node] for node in sources]
+        results = self.map_sources(_radius_chunk, source_indices, cutoff, processes, chunksize)
+        return {source: [self.nodes[i] for i in reached] for source, reached in zip(sources, results)}
+
+    # Применяет worker к источникам по частям и отдаёт результаты по одному в исходном порядке.
+    # Рабочие процессы подключаются к CSR-массивам через разделяемую память, без копирования.
+    def map_sources(self, worker, source_indices, cutoff, processes=None, chunksize=64):
+        if processes == 1 or len(source_indices) <= chunksize:
+            yield from worker(self.indptr, self.indices, self.weights, source_indices, cutoff)
+            return
+
+        blocks = []
+        try:
+            specs = []
+            for array in (self.indptr, self.indices, self.weights):
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+                blocks.append(block)
+                specs.append((block.name, array.dtype.str, array.shape))
+
+            chunks = [source_indices[i:i + chunksize] for i in range(0, len(source_indices), chunksize)]
+            with ProcessPoolExecutor(max_workers=processes, initializer=_attach_shared_csr,
+                                     initargs=(specs,)) as executor:
+                for chunk_result in executor.map(_shared_chunk, [worker] * len(chunks), chunks,
+                                                 [cutoff] * len(chunks)):
+                    yield from chunk_result
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+
+def _csr_dijkstra(indptr, indices, weights, sources, cutoff):
+    dist = np.full(len(indptr) - 1, np.inf)
+    heap = []
+    for source in sources:
+        dist[source] = 0
+        heap.append((0, source))
+    heapq.heapify(heap)
+
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        start, end = indptr[u], indptr[u + 1]
+        neighbors = indices[start:end]
+        new_dist = d + weights[start:end]
+        better = (new_dist < dist[neighbors]) & (new_dist <= cutoff)
+        if better.any():
+            neighbors = neighbors[better]
+            new_dist = new_dist[better]
+            dist[neighbors] = new_dist
+            for v, dv in zip(neighbors.tolist(), new_dist.tolist()):
+                heapq.heappush(heap, (dv, v))
+
+    return dist
+
+
+def _radius_chunk(indptr, indices, weights, sources, cutoff):
+    return [np.flatnonzero(_csr_dijkstra(indptr, indices, weights, [source], cutoff) <= cutoff)
+            for source in sources]
+
+
+# CSR-массивы в разделяемой памяти, к которым подключается каждый рабочий процесс
+_shared_csr = None
+
+
+def _attach_shared_csr(specs):
+    global _shared_csr
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+    arrays = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+              for block, (_, dtype, shape) in zip(blocks, specs)]
+    _shared_csr = (blocks, arrays)
+
+
+def _shared_chunk(worker, sources, cutoff):
+    indptr, indices, weights = _shared_csr[1]
+    return worker(indptr, indices, weights, sources, cutoff)
+
+
+# Строки расстояний для части источников скомпилированной Дейкстрой из scipy
+def _distance_rows_chunk(indptr, indices, weights, sources, cutoff):
+    n = len(indptr) - 1
+    graph = csr_matrix((weights, indices, indptr), shape=(n, n))
+    return list(dijkstra(graph, indices=sources, limit=cutoff))
+
+
+# Предвычисленный индекс расстояний. Если матрица всех пар помещается в max_bytes,
+# хранится она (uint16/uint32, недостижимость — максимум типа), иначе — расстояния
+# от нескольких ориентиров (landmarks), дающие нижнюю и верхнюю оценки по неравенству
+# треугольника. Таблица пишется в .npy и при загрузке отображается в память.
+#
+# Строки матрицы считаются скомпилированной Дейкстрой (scipy.sparse.csgraph)
+# частями источников, части распределяются по процессам.
+# Ориентиры отвечают на запрос радиуса сами лишь в редких случаях (почти всегда
+# остаются узлы между оценками), так что они дают только оценки расстояний и
+# поиском планет в радиусе не используются.
+class DistanceIndex:
+    def __init__(self, nodes, kind, table, fingerprint, landmarks=None):
+        self.nodes = nodes
+        self.node_index = {node: i for i, node in enumerate(nodes)}
+        self.kind = kind
+        self.table = table
+        self.fingerprint = fingerprint
+        self.landmarks = landmarks or []
+        if kind == "matrix" and np.issubdtype(table.dtype, np.integer):
+            self.unreachable = np.iinfo(table.dtype).max
+        else:
+            self.unreachable = np.inf
+
+    @classmethod
+    def build(cls, csr, path=None, max_bytes=512 * 2 ** 20, landmark_count=16, processes=None, seed=None):
+        n = len(csr.nodes)
+        dtype = cls._matrix_dtype(csr)
+        if n * n * np.dtype(dtype).itemsize <= max_bytes:
+            table = cls._allocate(path, dtype, (n, n))
+            rows = csr.map_sources(_distance_rows_chunk, list(range(n)), np.inf, processes)
+            for i, dist in enumerate(rows):
+                if np.issubdtype(dtype, np.integer):
+                    dist = np.where(np.isinf(dist), np.iinfo(dtype).max, dist)
+                table[i] = dist
+            index = cls(csr.nodes, "matrix", table, csr.fingerprint())
+        else:
+            landmarks, table = cls._choose_landmarks(csr, path, min(landmark_count, n), seed)
+            index = cls(csr.nodes, "landmarks", table, csr.fingerprint(), landmarks)
+
+        if path is not None:
+            table.flush()
+            index._save_meta(path)
+        return index
+
+    @staticmethod
+    def _matrix_dtype(csr):
+        weights = csr.weights
+        if len(weights) and (np.any(weights < 0) or np.any(weights != np.round(weights))):
+            return np.float32
+        bound = (len(csr.nodes) - 1) * (weights.max() if len(weights) else 0)
+        return np.uint16 if bound < np.iinfo(np.uint16).max else np.uint32
+
+    @staticmethod
+    def _allocate(path, dtype, shape):
+        if path is None:
+            return np.empty(shape, dtype=dtype)
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+    # Ориентиры выбираются методом самой дальней точки
+    @classmethod
+    def _choose_landmarks(cls, csr, path, count, seed):
+        n = len(csr.nodes)
+        table = cls._allocate(path, np.float32, (count, n))
+        nearest = np.full(n, np.inf)
+        landmark = int(np.random.default_rng(seed).integers(n))
+        landmarks = []
+        for k in range(count):
+            landmarks.append(landmark)
+            dist = _distance_rows_chunk(csr.indptr, csr.indices, csr.weights, [landmark], np.inf)[0]
+            table[k] = dist
+            nearest = np.minimum(nearest, dist)
+            finite = np.where(np.isfinite(nearest), nearest, -1)
+            landmark = int(np.argmax(finite))
+        return landmarks, table
+
+    def _save_meta(self, path):
+        meta = {"kind": self.kind, "nodes": self.nodes, "fingerprint": self.fingerprint,
+                "landmarks": self.landmarks}
+        with open(path + ".json", "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        table = np.load(path, mmap_mode="r")
+        return cls(meta["nodes"], meta["kind"], table, meta["fingerprint"], meta["landmarks"])
+
+    # Узлы в радиусе cutoff от node; только для матрицы
+    def nodes_within_distance(self, node, cutoff):
+        if self.kind != "matrix":
+            raise ValueError("Индекс ориентиров даёт только оценки расстояний")
+        row = self.table[self.node_index[node]]
+        if cutoff >= self.unreachable:
+            reached = np.flatnonzero(row != self.unreachable)
+        else:
+            reached = np.flatnonzero(row <= cutoff)
+        return [self.nodes[j] for j in reached]
+
+    # Нижняя и верхняя оценки расстояний от node до всех узлов по ориентирам
+    def distance_bounds(self, node):
+        if self.kind == "matrix":
+            row = self.table[self.node_index[node]].astype(np.float64)
+            row[row == self.unreachable] = np.inf
+            return row, row
+        from_source = self.table[:, self.node_index[node]][:, None]
+        with np.errstate(invalid="ignore"):
+            lower = np.nan_to_num(np.abs(from_source - self.table), nan=0.0).max(axis=0)
+        upper = (from_source + self.table).min(axis=0)
+        return lower, upper
+
+
+# Номер пары (u, v), u < v, в порядке (0, 1), (0, 2), (1, 2), (0, 3), ... -> сами узлы
+def _pair_from_index(k):
+    v = np.floor((1 + np.sqrt(1 + 8 * k.astype(np.float64))) / 2).astype(np.int64)
+    v -= v * (v - 1) // 2 > k
+    v += (v + 1) * v // 2 <= k
+    u = k - v * (v - 1) // 2
+    return u, v
+
+
+# Рёбра графа Эрдёша–Реньи: каждая неупорядоченная пара берётся с вероятностью p.
+# Вместо перебора всех пар сразу генерируются длины пропусков между выбранными парами.
+def sample_erdos_renyi_edges(num_nodes, p, rng):
+    total = num_nodes * (num_nodes - 1) // 2
+    if p <= 0 or total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    if p >= 1:
+        return _pair_from_index(np.arange(total, dtype=np.int64))
+
+    picked = []
+    last = -1
+    block = int(total * p * 1.05) + 64
+    while last < total:
+        positions = last + np.cumsum(rng.geometric(p, size=block))
+        picked.append(positions[positions < total])
+        last = positions[-1]
+    return _pair_from_index(np.concatenate(picked))
+
+
+# Геометрическая модель: соединяются планеты на расстоянии не больше radius.
+# Кандидаты ищутся через равномерную сетку с ячейкой radius: для каждой точки
+# просматриваются своя ячейка и четыре соседние (половина окрестности).
+def sample_geometric_edges(xs, ys, radius):
+    n = len(xs)
+    cx = ((xs - xs.min()) // radius).astype(np.int64)
+    cy = ((ys - ys.min()) // radius).astype(np.int64)
+    columns = cx.max() + 2
+    keys = cy * columns + cx
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    us, vs = [], []
+    for dx, dy in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+        target = (cy + dy) * columns + (cx + dx)
+        start = np.searchsorted(sorted_keys, target, side="left")
+        counts = np.searchsorted(sorted_keys, target, side="right") - start
+        if dx < 0:
+            counts[cx == 0] = 0
+        total = counts.sum()
+        i = np.repeat(np.arange(n), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        j = order[np.repeat(start, counts) + offsets]
+        keep = (xs[i] - xs[j]) ** 2 + (ys[i] - ys[j]) ** 2 <= radius ** 2
+        if dx == 0 and dy == 0:
+            keep &= i < j
+        us.append(i[keep])
+        vs.append(j[keep])
+    return np.concatenate(us), np.concatenate(vs)
+
+
+# Случайная галактика: координаты планет и рёбра с весами от 1 до max_weight.
+# model: "erdos_renyi" (каждая пара с вероятностью edge_probability) или
+# "geometric" (соседи в радиусе radius, вес растёт с расстоянием).
+def generate_galaxy(num_nodes, width, height, model="erdos_renyi", edge_probability=0.2,
+                    radius=None, max_weight=10, seed=None):
+    rng = np.random.default_rng(seed)
+    xs = rng.integers(50, width - 50, size=num_nodes, endpoint=True)
+    ys = rng.integers(50, height - 50, size=num_nodes, endpoint=True)
+
+    if model == "erdos_renyi":
+        u, v = sample_erdos_renyi_edges(num_nodes, edge_probability, rng)
+        weights = rng.integers(1, max_weight, size=len(u), endpoint=True)
+    elif model == "geometric":
+        if radius is None:
+            # Радиус, при котором у планеты в среднем около шести соседей
+            radius = np.sqrt(6 * max(width - 100, 1) * max(height - 100, 1) / (np.pi * max(num_nodes, 1)))
+        u, v = sample_geometric_edges(xs, ys, radius)
+        length = np.hypot(xs[u] - xs[v], ys[u] - ys[v])
+        weights = np.clip(np.ceil(length / radius * max_weight), 1, max_weight).astype(np.int64)
+    else:
+        raise ValueError(f"Неизвестная модель галактики: {model}")
+
+    return xs, ys, u, v, weights
+
+
+# LRU-кэш результатов поиска планет в радиусе. На каждый источник хранится
+# результат для наибольшего запрошенного радиуса, отсортированный по расстоянию,
+# поэтому ответ для меньшего радиуса получается префиксом этого результата.
+class ReachabilityCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def get(self, source, cutoff):
+        entry = self.entries.get(source)
+        if entry is None or entry[0] < cutoff:
+            return None
+        self.entries.move_to_end(source)
+        _, nodes, dists = entry
+        return nodes[:np.searchsorted(dists, cutoff, side="right")]
+
+    def put(self, source, cutoff, nodes, dists):
+        order = np.argsort(dists, kind="stable")
+        self.entries[source] = (cutoff, [nodes[i] for i in order], dists[order])
+        self.entries.move_to_end(source)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
 
 
 class GraphWidget(QWidget):
+    DETAILED_EDGE_LIMIT = 2000
+    DETAILED_MIN_SCALE = 0.5
+    DENSITY_CELL = 4
+
     def __init__(self, parent=None):
         super(GraphWidget, self).__init__(parent)
         self.graph = nx.Graph()
@@ -17,82 +398,270 @@ class GraphWidget(QWidget):
         self.selected_node = None
         self.distance = 1
         self.highlighted_nodes = set()
+        self._csr = None
+        self.reachability_cache = ReachabilityCache()
+        self.distance_index = None
+        self.scale = 1.0
+        self.offset = QPointF(0, 0)
+        self._pan_start = None
+        self._static_layer = None
+        self._layer_view = None
+        self._edge_lines_cache = None
+        self._spatial_index = None
+
+        # Во время масштабирования и перемещения слой не перерисовывается, а
+        # растягивается и сдвигается; перерисовка — после паузы или отпускания кнопки
+        self._rebuild_timer = QTimer(self)
+        self._rebuild_timer.setSingleShot(True)
+        self._rebuild_timer.setInterval(150)
+        self._rebuild_timer.timeout.connect(self._invalidate_layer)
 
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        node_pen = QPen(Qt.black)
-        node_brush = QColor(255, 255, 255)
 
-        edge_pen = QPen(Qt.black)
-        font = QFont("Arial", 8)
-
-        # Рисуем узлы
-        for u, v, data in self.graph.edges(data=True):
-            x1, y1 = self.nodes_positions[u]
-            x2, y2 = self.nodes_positions[v]
+        # Статический слой (рёбра, веса, узлы) рисуется один раз и берётся из кэша,
+        # при выборе планеты перерисовывается только подсветка поверх него
+        if self._static_layer is None or self._static_layer.size() != self.size():
+            self._static_layer = self._render_static_layer()
+            self._layer_view = (self.scale, QPointF(self.offset))
+        layer_scale, layer_offset = self._layer_view
+        factor = self.scale / layer_scale
+        shift = self.offset - layer_offset * factor
+        painter.setTransform(QTransform(factor, 0, 0, factor, shift.x(), shift.y()))
+        painter.drawPixmap(0, 0, self._static_layer)
+
+        painter.setTransform(self._view_transform())
+        self._draw_overlay(painter)
+
+    def _view_transform(self):
+        return QTransform(self.scale, 0, 0, self.scale, self.offset.x(), self.offset.y())
+
+    # Подробная отрисовка только для небольших графов при достаточном масштабе,
+    # иначе веса рёбер скрываются, а плотные области узлов агрегируются
+    def _detailed(self):
+        return self.graph.number_of_edges() <= self.DETAILED_EDGE_LIMIT and self.scale >= self.DETAILED_MIN_SCALE
+
+    def _edge_lines(self):
+        if self._edge_lines_cache is None:
+            positions = self.nodes_positions
+            self._edge_lines_cache = [QLineF(*positions[u], *positions[v]) for u, v in self.graph.edges()]
+        return self._edge_lines_cache
+
+    def _render_static_layer(self):
+        layer = QPixmap(self.size())
+        layer.fill(self.palette().color(self.backgroundRole()))
+        painter = QPainter(layer)
+        painter.setTransform(self._view_transform())
+        detailed = self._detailed()
+
+        if detailed:
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(QPen(Qt.black))
+            painter.setFont(QFont("Arial", 8))
+
+            # Рисуем ребра и их веса
+            for u, v, data in self.graph.edges(data=True):
+                x1, y1 = self.nodes_positions[u]
+                x2, y2 = self.nodes_positions[v]
+                painter.drawLine(QLineF(x1, y1, x2, y2))
+                painter.drawText(QPointF((x1 + x2) / 2, (y1 + y2) / 2), str(data.get("weight", "")))
+
+            # Рисуем узлы
+            painter.setBrush(QColor(255, 255, 255))
+            for node, (x, y) in self.nodes_positions.items():
+                painter.drawEllipse(QRectF(x - 10, y - 10, 20, 20))
+                painter.drawText(QPointF(x - 5, y + 5), str(node))  #Пишем номер узла
+        else:
+            edge_pen = QPen(QColor(0, 0, 0, 60))
+            edge_pen.setCosmetic(True)
             painter.setPen(edge_pen)
-            painter.drawLine(x1, y1, x2, y2)
-
-            mid_x = (x1 + x2) / 2
-            mid_y = (y1 + y2) / 2
+            painter.drawLines(self._edge_lines())
+            self._draw_node_density(painter)
 
-            # Рисуем ребра
-            weight = data.get("weight", "")
-            painter.setFont(font)
-            painter.drawText(QPointF(mid_x, mid_y), str(weight))
+        painter.end()
+        return layer
 
-        # Подсвечиваем узлы
-        for node, pos in self.nodes_positions.items():
-            painter.setPen(node_pen)
-            painter.setBrush(node_brush)
-            if node in self.highlighted_nodes:
-                painter.setBrush(Qt.yellow)  #Подсвечиваем подходящие узлы
-            painter.drawEllipse(pos[0] - 10, pos[1] - 10, 20, 20)
-            painter.drawText(pos[0] - 5, pos[1] + 5, str(node))  #Пишем номер узла
+    # Узлы агрегируются по ячейкам экрана: чем больше планет в ячейке, тем она темнее
+    def _draw_node_density(self, painter):
+        if not self.nodes_positions:
+            return
+        positions = np.array(list(self.nodes_positions.values()), dtype=np.float64)
+        screen_x = positions[:, 0] * self.scale + self.offset.x()
+        screen_y = positions[:, 1] * self.scale + self.offset.y()
+        visible = (screen_x >= 0) & (screen_x < self.width()) & (screen_y >= 0) & (screen_y < self.height())
+        cell = self.DENSITY_CELL
+        cells_x = (screen_x[visible] // cell).astype(np.int64)
+        cells_y = (screen_y[visible] // cell).astype(np.int64)
+        columns = self.width() // cell + 1
+        keys, counts = np.unique(cells_y * columns + cells_x, return_counts=True)
+
+        painter.resetTransform()
+        painter.setPen(Qt.NoPen)
+        alphas = np.clip(80 + 175 * np.log1p(counts) / np.log1p(counts.max()), 80, 255).astype(int)
+        for key, alpha in zip(keys.tolist(), alphas.tolist()):
+            painter.setBrush(QColor(0, 0, 128, alpha))
+            painter.drawRect(QRectF((key % columns) * cell, (key // columns) * cell, cell, cell))
+
+    def _draw_overlay(self, painter):
+        painter.setPen(QPen(Qt.black))
+        if self._detailed():
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setFont(QFont("Arial", 8))
+            # Подсвечиваем подходящие узлы
+            painter.setBrush(Qt.yellow)
+            for node in self.highlighted_nodes:
+                x, y = self.nodes_positions[node]
+                painter.drawEllipse(QRectF(x - 10, y - 10, 20, 20))
+                painter.drawText(QPointF(x - 5, y + 5), str(node))
+        else:
+            highlight_pen = QPen(Qt.yellow, 4)
+            highlight_pen.setCosmetic(True)
+            painter.setPen(highlight_pen)
+            painter.drawPoints(QPolygonF([QPointF(*self.nodes_positions[node]) for node in self.highlighted_nodes]))
+            painter.setPen(QPen(Qt.black))
 
         # Рисуем выбранный узел
-        if self.selected_node:
+        if self.selected_node is not None:
+            x, y = self.nodes_positions[self.selected_node]
             painter.setBrush(Qt.blue)
-            painter.drawEllipse(self.nodes_positions[self.selected_node][0] - 10,
-                                self.nodes_positions[self.selected_node][1] - 10, 20, 20)
+            painter.drawEllipse(QRectF(x - 10, y - 10, 20, 20))
 
-    def generate_graph(self, num_nodes):
+    def _invalidate_layer(self):
+        self._rebuild_timer.stop()
+        self._static_layer = None
+        self.update()
+
+    def _view_changed(self):
+        self._rebuild_timer.start()
+        self.update()
+
+    def resizeEvent(self, event):
+        self._static_layer = None
+        super(GraphWidget, self).resizeEvent(event)
+
+    # Масштабирование колесом мыши относительно курсора
+    def wheelEvent(self, event):
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        pos = QPointF(event.pos())
+        self.offset = pos - (pos - self.offset) * factor
+        self.scale *= factor
+        self._view_changed()
+
+    # Перемещение по галактике правой кнопкой мыши
+    def mouseMoveEvent(self, event):
+        if self._pan_start is not None and event.buttons() & Qt.RightButton:
+            pos = QPointF(event.pos())
+            self.offset += pos - self._pan_start
+            self._pan_start = pos
+            self._view_changed()
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.RightButton:
+            self._pan_start = None
+            self._invalidate_layer()
+
+    def generate_graph(self, num_nodes, model="erdos_renyi", seed=None, **kwargs):
         self.graph.clear()
-        self.nodes_positions = {}
         self.selected_node = None
         self.highlighted_nodes.clear()
 
-        # Генерируем случайные узлы и ребра
-        for i in range(num_nodes):
-            self.graph.add_node(i)
-            self.nodes_positions[i] = (random.randint(50, self.width() - 50), random.randint(50, self.height() - 50))
+        # Генерируем случайные узлы и ребра сразу массивами
+        xs, ys, u, v, weights = generate_galaxy(num_nodes, self.width(), self.height(), model, seed=seed, **kwargs)
+        self.nodes_positions = dict(enumerate(zip(xs.tolist(), ys.tolist())))
+        self._spatial_index = GridIndex.from_positions(self.nodes_positions, 20)
+        self.graph.add_nodes_from(range(num_nodes))
+        self.graph.add_weighted_edges_from(zip(u.tolist(), v.tolist(), weights.tolist()))
 
-        for u in self.graph.nodes():
-            for v in self.graph.nodes():
-                if u != v and random.random() < 0.2:  # Вероятность создания узла
-                    weight = random.randint(1, 10)
-                    self.graph.add_edge(u, v, weight=weight)
+        self._graph_changed()
+        self._csr = CSRGraph.from_edges(num_nodes, u, v, weights)
+        self.update()
 
+    # Изменение рёбер; кэши сбрасываются только при реальном изменении графа
+    def set_edge(self, u, v, weight):
+        for node in (u, v):
+            if node not in self.graph:
+                raise ValueError(f"Планеты {node} нет в галактике")
+        if self.graph.has_edge(u, v) and self.graph[u][v].get("weight") == weight:
+            return
+        self.graph.add_edge(u, v, weight=weight)
+        self._graph_changed()
         self.update()
 
+    def remove_edge(self, u, v):
+        if not self.graph.has_edge(u, v):
+            return
+        self.graph.remove_edge(u, v)
+        self._graph_changed()
+        self.update()
+
+    def _graph_changed(self):
+        self._csr = None
+        self._static_layer = None
+        self._edge_lines_cache = None
+        self.reachability_cache.clear()
+        self.distance_index = None
+
+    # Включает индекс расстояний; с path таблица сохраняется на диск
+    def build_distance_index(self, path=None, **kwargs):
+        self.distance_index = DistanceIndex.build(self.csr_graph(), path, **kwargs)
+        return self.distance_index
+
+    # Загружает сохранённый индекс, если он построен для текущего графа
+    def load_distance_index(self, path):
+        index = DistanceIndex.load(path)
+        if index.fingerprint != self.csr_graph().fingerprint() or index.nodes != self.csr_graph().nodes:
+            return None
+        self.distance_index = index
+        return index
+
     def find_nodes_within_distance(self, node, distance):
         if node not in self.graph.nodes():
             return []
 
-        reachable_nodes = nx.single_source_dijkstra_path_length(self.graph, node, cutoff=distance)
-        return list(reachable_nodes.keys())
+        cached = self.reachability_cache.get(node, distance)
+        if cached is not None:
+            return list(cached)
+
+        if self.distance_index is not None and self.distance_index.kind == "matrix":
+            return self.distance_index.nodes_within_distance(node, distance)
+
+        csr = self.csr_graph()
+        dist = csr.dijkstra([node], distance)
+        reached = np.flatnonzero(dist <= distance)
+        self.reachability_cache.put(node, distance, [csr.nodes[i] for i in reached], dist[reached])
+        return self.reachability_cache.get(node, distance)
+
+    def csr_graph(self):
+        if self._csr is None:
+            self._csr = CSRGraph.from_networkx(self.graph)
+        return self._csr
+
+    # Планеты на расстоянии не больше distance от ближайшего из узлов nodes
+    def find_nodes_within_distance_multi(self, nodes, distance):
+        nodes = [node for node in nodes if node in self.graph]
+        if not nodes:
+            return []
+        return self.csr_graph().nodes_within_distance(nodes, distance)
+
+    # Для каждого узла из nodes свой список планет; считается в нескольких процессах
+    def find_nodes_within_distance_batch(self, nodes, distance, processes=None):
+        nodes = [node for node in nodes if node in self.graph]
+        return self.csr_graph().batch_nodes_within_distance(nodes, distance, processes=processes)
 
     def mousePressEvent(self, event):
-        pos = event.pos()
-        for node, (x, y) in self.nodes_positions.items():
-            if (x - pos.x()) ** 2 + (y - pos.y()) ** 2 <= 100:
-                self.selected_node = node
-                self.highlighted_nodes.clear()
-                self.highlighted_nodes.update(self.find_nodes_within_distance(node, self.distance))
-                self.update()
-                break
+        if event.button() == Qt.RightButton:
+            self._pan_start = QPointF(event.pos())
+            return
+
+        pos = self._view_transform().inverted()[0].map(QPointF(event.pos()))
+        if self._spatial_index is None:
+            return
+        node = self._spatial_index.nearest(pos.x(), pos.y(), 10)
+        if node is not None:
+            self.selected_node = node
+            self.highlighted_nodes.clear()
+            self.highlighted_nodes.update(self.find_nodes_within_distance(node, self.distance))
+            self.update()
 
 
 class MainWindow(QMainWindow):
@@ -118,7 +687,7 @@ class MainWindow(QMainWindow):
 
         self.num_nodes_spinbox = QSpinBox()
         self.num_nodes_spinbox.setMinimum(1)
-        self.num_nodes_spinbox.setMaximum(100)
+        self.num_nodes_spinbox.setMaximum(100000)
         controls_layout.addWidget(self.num_nodes_spinbox)
 
         self.generate_button = QPushButton("Сгенерировать галактику (граф)")
@@ -139,7 +708,8 @@ class MainWindow(QMainWindow):
 
     def generate_graph(self):
         num_nodes = self.num_nodes_spinbox.value()
-        self.graph_widget.generate_graph(num_nodes)
+        # На больших галактиках у планеты в среднем не больше десятка соседей
+        self.graph_widget.generate_graph(num_nodes, edge_probability=min(0.2, 10 / num_nodes))
 
     def find_nodes_within_distance(self):
         node = self.graph_widget.selected_node
@@ -0,0 +1,41 @@
+from collections import defaultdict
+
+
+# Равномерная сетка для поиска узла под курсором. Каждая точка лежит в ячейке
+# размера cell_size, поэтому поиск в радиусе до cell_size просматривает
+# не больше девяти ячеек независимо от количества узлов.
+class GridIndex:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+
+    @classmethod
+    def from_positions(cls, positions, cell_size):
+        index = cls(cell_size)
+        for key, (x, y) in positions.items():
+            index.insert(key, x, y)
+        return index
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, key, x, y):
+        self.cells[self._cell(x, y)].append((key, x, y))
+
+    def clear(self):
+        self.cells.clear()
+
+    # Ближайший к (x, y) узел не дальше radius или None
+    def nearest(self, x, y, radius):
+        reach = int(radius // self.cell_size) + 1
+        cx, cy = self._cell(x, y)
+        best_key = None
+        best_dist = radius * radius
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for key, px, py in self.cells.get((i, j), ()):
+                    dist = (px - x) ** 2 + (py - y) ** 2
+                    if dist <= best_dist:
+                        best_key = key
+                        best_dist = dist
+        return best_key
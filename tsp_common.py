@@ -0,0 +1,558 @@
+import csv
+import json
+import time
+import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Сбор статистики решателя: время по фазам, счётчики и трассы по итерациям.
+# Выключенный сборщик (enabled=False) ничего не записывает и почти ничего не стоит.
+class SolverStats:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.timers = {}
+        self.counters = {}
+        self.traces = {}
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NO_PHASE
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] = self.timers.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def trace(self, name, iteration, value):
+        if self.enabled:
+            self.traces.setdefault(name, []).append((iteration, value))
+
+    def as_dict(self):
+        return {'timers': dict(self.timers), 'counters': dict(self.counters),
+                'traces': {name: [list(point) for point in points] for name, points in self.traces.items()}}
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    # Плоская таблица: kind, name, iteration, value
+    def to_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['kind', 'name', 'iteration', 'value'])
+            for name, value in self.timers.items():
+                writer.writerow(['timer', name, '', value])
+            for name, value in self.counters.items():
+                writer.writerow(['counter', name, '', value])
+            for name, points in self.traces.items():
+                for iteration, value in points:
+                    writer.writerow(['trace', name, iteration, value])
+
+
+_NO_PHASE = nullcontext()
+DISABLED_STATS = SolverStats(enabled=False)
+
+
+# Метрики расстояний. Узлы задаются позициями в списке nodes; pairs(a, b)
+# считает расстояния для массивов пар сразу, row(i, js) — от узла i до узлов js.
+class EuclideanMetric:
+    def __init__(self, coords):
+        self.coords = coords
+
+    def pairs(self, a, b):
+        return np.hypot(*(self.coords[b] - self.coords[a]).T)
+
+    def row(self, i, js):
+        return self.pairs(np.full(len(js), i), js)
+
+    def distance(self, i, j):
+        return float(self.pairs(np.array([i]), np.array([j]))[0])
+
+    def cycle_length(self, order):
+        order = np.asarray(order)
+        return float(self.pairs(order, np.roll(order, -1)).sum())
+
+
+class ManhattanMetric(EuclideanMetric):
+    def pairs(self, a, b):
+        return np.abs(self.coords[b] - self.coords[a]).sum(axis=1)
+
+
+# Расстояние по большому кругу (км); x — долгота, y — широта в градусах
+class HaversineMetric(EuclideanMetric):
+    EARTH_RADIUS = 6371.0
+
+    def __init__(self, coords):
+        super().__init__(np.radians(coords))
+
+    def pairs(self, a, b):
+        lon1, lat1 = self.coords[a].T
+        lon2, lat2 = self.coords[b].T
+        h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * self.EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+# Явная (в том числе несимметричная) матрица: matrix[i, j] — путь из i в j.
+# Файл .npy открывается через отображение в память и читается по мере надобности.
+class MatrixMetric(EuclideanMetric):
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path, mmap_mode='r'))
+
+    def pairs(self, a, b):
+        return np.asarray(self.matrix[a, b], dtype=np.float64)
+
+    def row(self, i, js):
+        return np.asarray(self.matrix[i][js], dtype=np.float64)
+
+
+# Ленивый кэш строк для дорогих метрик. Строка считается целиком и кэшируется
+# только при повторном обращении к узлу: решатели, читающие каждую строку один
+# раз (ближайший сосед), не заполняют кэш. Объём кэша ограничен max_bytes,
+# вытесняются давно не использованные строки (LRU).
+class CachedMetric(EuclideanMetric):
+    def __init__(self, metric, size, max_bytes=64 * 2 ** 20):
+        self.metric = metric
+        self.all_nodes = np.arange(size)
+        self.max_rows = max(1, max_bytes // (8 * max(size, 1)))
+        self.rows = OrderedDict()
+        self.requested = np.zeros(size, dtype=bool)
+
+    def full_row(self, i):
+        row = self.rows.get(i)
+        if row is None:
+            row = self.metric.row(i, self.all_nodes)
+            self.rows[i] = row
+            if len(self.rows) > self.max_rows:
+                self.rows.popitem(last=False)
+        else:
+            self.rows.move_to_end(i)
+        return row
+
+    def pairs(self, a, b):
+        return self.metric.pairs(a, b)
+
+    def row(self, i, js):
+        if i not in self.rows and not self.requested[i]:
+            self.requested[i] = True
+            return self.metric.row(i, js)
+        return self.full_row(i)[js]
+
+    def distance(self, i, j):
+        row = self.rows.get(i)
+        if row is None:
+            return self.metric.distance(i, j)
+        return float(row[j])
+
+
+METRICS = {'euclidean': EuclideanMetric, 'manhattan': ManhattanMetric, 'haversine': HaversineMetric}
+
+
+# Метрика по имени из METRICS или готовый объект метрики; None — евклидова
+def make_metric(nodes, metric=None):
+    if metric is None:
+        metric = 'euclidean'
+    if not isinstance(metric, str):
+        return metric
+    coords = np.array([(node.x, node.y) for node in nodes], dtype=np.float64)
+    if metric == 'haversine':
+        return CachedMetric(HaversineMetric(coords), len(nodes))
+    return METRICS[metric](coords)
+
+
+# Непосещённые узлы, разложенные по ячейкам равномерной сетки. Узлы ячейки c
+# занимают slots[starts[c]:starts[c] + remaining[c]], посещённый узел удаляется
+# обменом с последним живым узлом ячейки за O(1). Ближайший непосещённый узел
+# ищется по кольцам ячеек вокруг текущего, пока кольцо не окажется дальше
+# найденного. Граница верна, только если метрика не меньше евклидова расстояния
+# по координатам (евклидова, манхэттенская); для прочих метрик сетка из одной
+# ячейки, и поиск просматривает все непосещённые узлы.
+class UnvisitedGrid:
+    def __init__(self, coords=None, size=None):
+        n = len(coords) if coords is not None else size
+        self.side = max(1, int(np.sqrt(n / 2))) if coords is not None else 1
+        if self.side > 1:
+            low = coords.min(axis=0)
+            self.cell_size = max(float((coords.max(axis=0) - low).max()), 1e-12) / self.side
+            cells = np.minimum(((coords - low) / self.cell_size).astype(np.int64), self.side - 1)
+            self.cell_x, self.cell_y = cells[:, 0], cells[:, 1]
+        else:
+            self.cell_size = np.inf
+            self.cell_x = self.cell_y = np.zeros(n, dtype=np.int64)
+        self.cells = self.cell_y * self.side + self.cell_x
+        self.order = np.argsort(self.cells, kind='stable')
+        self.starts = np.searchsorted(self.cells[self.order], np.arange(self.side * self.side + 1))
+        self.reset()
+
+    def reset(self):
+        self.slots = self.order.copy()
+        self.positions = np.empty(len(self.order), dtype=np.int64)
+        self.positions[self.slots] = np.arange(len(self.slots))
+        self.remaining = np.diff(self.starts)
+
+    def remove(self, i):
+        cell = self.cells[i]
+        last = self.starts[cell] + self.remaining[cell] - 1
+        position = self.positions[i]
+        moved = self.slots[last]
+        self.slots[position], self.slots[last] = moved, i
+        self.positions[moved], self.positions[i] = position, last
+        self.remaining[cell] -= 1
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            xs, ys = np.array([cx]), np.array([cy])
+        else:
+            span = np.arange(-r, r + 1)
+            inner = span[1:-1]
+            xs = np.concatenate([cx + span, cx + span, np.full(len(inner), cx - r), np.full(len(inner), cx + r)])
+            ys = np.concatenate([np.full(len(span), cy - r), np.full(len(span), cy + r), cy + inner, cy + inner])
+        inside = (xs >= 0) & (xs < self.side) & (ys >= 0) & (ys < self.side)
+        cells = ys[inside] * self.side + xs[inside]
+        return cells[self.remaining[cells] > 0]
+
+    # Ближайший к i непосещённый узел и число вычисленных расстояний
+    def nearest(self, i, metric):
+        cx, cy = int(self.cell_x[i]), int(self.cell_y[i])
+        widest = max(cx, cy, self.side - 1 - cx, self.side - 1 - cy)
+        best, best_distance, evaluations = -1, np.inf, 0
+        for r in range(widest + 1):
+            cells = self._ring(cx, cy, r)
+            if len(cells):
+                found = np.concatenate([self.slots[self.starts[c]:self.starts[c] + self.remaining[c]]
+                                        for c in cells.tolist()])
+                distances = metric.row(i, found)
+                evaluations += len(found)
+                k = int(np.argmin(distances))
+                if distances[k] < best_distance:
+                    best, best_distance = int(found[k]), distances[k]
+            if best >= 0 and best_distance <= r * self.cell_size:
+                break
+        return best, evaluations
+
+
+# Быстрые конструктивные эвристики. Все работают с массивом координат (n, 2)
+# и возвращают порядок обхода как массив индексов узлов.
+
+# Номер точки на кривой Гильберта порядка order (координаты от 0 до 2**order - 1)
+def hilbert_index(x, y, order=16):
+    side = 1 << order
+    x = x.astype(np.int64)
+    y = y.astype(np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return d
+
+
+def _hilbert_keys(coords, shift=0.0, order=16):
+    low = coords.min(axis=0)
+    span = max(float((coords.max(axis=0) - low).max()), 1e-12)
+    scaled = ((coords - low) / span + shift) % 1.0
+    grid = np.minimum((scaled * (1 << order)).astype(np.int64), (1 << order) - 1)
+    return hilbert_index(grid[:, 0], grid[:, 1], order)
+
+
+# Обход в порядке кривой Гильберта, O(n log n)
+def hilbert_tour(coords):
+    return np.argsort(_hilbert_keys(coords), kind='stable')
+
+
+# Приближённые k ближайших соседей: кандидаты берутся из окон вдоль двух
+# сдвинутых относительно друг друга кривых Гильберта, затем оставляются k ближайших
+def candidate_neighbors(coords, k=8):
+    n = len(coords)
+    k = min(k, n - 1)
+    offsets = np.concatenate([np.arange(-k, 0), np.arange(1, k + 1)])
+    candidates = []
+    for shift in (0.0, 0.5):
+        order = np.argsort(_hilbert_keys(coords, shift), kind='stable')
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+        positions = np.clip(rank[:, None] + offsets[None, :], 0, n - 1)
+        candidates.append(order[positions])
+    candidates = np.sort(np.concatenate(candidates, axis=1), axis=1)
+
+    dist = np.hypot(*(coords[candidates] - coords[:, None, :]).transpose(2, 0, 1))
+    dist[candidates == np.arange(n)[:, None]] = np.inf
+    dist[:, 1:][candidates[:, 1:] == candidates[:, :-1]] = np.inf
+    nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    rows = np.arange(n)[:, None]
+    by_distance = np.argsort(dist[rows, nearest], axis=1)
+    return candidates[rows, nearest[rows, by_distance]]
+
+
+def _candidate_edges(coords, k):
+    neighbors = candidate_neighbors(coords, k)
+    u = np.repeat(np.arange(len(coords)), neighbors.shape[1])
+    v = neighbors.ravel()
+    u, v = np.minimum(u, v), np.maximum(u, v)
+    edges = np.unique(u * len(coords) + v)
+    u, v = edges // len(coords), edges % len(coords)
+    lengths = np.hypot(*(coords[u] - coords[v]).T)
+    order = np.argsort(lengths, kind='stable')
+    return u[order].tolist(), v[order].tolist()
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+# Жадное сопоставление рёбер: кратчайшие рёбра-кандидаты добавляются, пока степень
+# концов меньше двух и не образуется цикл; получившиеся цепочки сшиваются
+# переходом к ближайшему концу ещё не пройденной цепочки
+def greedy_edge_tour(coords, k=8):
+    n = len(coords)
+    if n < 3:
+        return np.arange(n)
+    parent = list(range(n))
+    degree = [0] * n
+    adjacency = [[] for _ in range(n)]
+    for i, j in zip(*_candidate_edges(coords, k)):
+        if degree[i] < 2 and degree[j] < 2:
+            root_i, root_j = _find(parent, i), _find(parent, j)
+            if root_i != root_j:
+                parent[root_i] = root_j
+                degree[i] += 1
+                degree[j] += 1
+                adjacency[i].append(j)
+                adjacency[j].append(i)
+
+    fragments = []
+    visited = [False] * n
+    for start in range(n):
+        if visited[start] or degree[start] == 2:
+            continue
+        fragment = [start]
+        visited[start] = True
+        previous, current = -1, start
+        while True:
+            following = [j for j in adjacency[current] if j != previous]
+            if not following:
+                break
+            previous, current = current, following[0]
+            visited[current] = True
+            fragment.append(current)
+        fragments.append(fragment)
+
+    # Цепочки сшиваются переходом к ближайшему свободному концу: концы хранятся
+    # в сетке, номер конца e < F — начало цепочки e, иначе конец цепочки e - F
+    count = len(fragments)
+    ends = coords[[fragment[0] for fragment in fragments] + [fragment[-1] for fragment in fragments]]
+    free_ends = UnvisitedGrid(ends)
+    metric = EuclideanMetric(ends)
+    free_ends.remove(0)
+    free_ends.remove(count)
+    tour = list(fragments[0])
+    current = count
+    for _ in range(count - 1):
+        nearest, _ = free_ends.nearest(current, metric)
+        fragment = nearest % count
+        free_ends.remove(fragment)
+        free_ends.remove(fragment + count)
+        if nearest < count:
+            tour.extend(fragments[fragment])
+            current = fragment + count
+        else:
+            tour.extend(reversed(fragments[fragment]))
+            current = fragment
+    return np.array(tour)
+
+
+# Удвоение минимального остовного дерева (как в алгоритме Кристофидеса, но без
+# паросочетания): дерево Краскала на рёбрах-кандидатах обходится в прямом порядке,
+# компоненты леса идут в порядке кривой Гильберта их корней
+def mst_tour(coords, k=8):
+    n = len(coords)
+    if n < 3:
+        return np.arange(n)
+    parent = list(range(n))
+    adjacency = [[] for _ in range(n)]
+    for i, j in zip(*_candidate_edges(coords, k)):
+        root_i, root_j = _find(parent, i), _find(parent, j)
+        if root_i != root_j:
+            parent[root_i] = root_j
+            adjacency[i].append(j)
+            adjacency[j].append(i)
+
+    visited = [False] * n
+    tour = []
+    for root in hilbert_tour(coords).tolist():
+        if visited[root]:
+            continue
+        visited[root] = True
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            tour.append(current)
+            for j in adjacency[current]:
+                if not visited[j]:
+                    visited[j] = True
+                    stack.append(j)
+    return np.array(tour)
+
+
+CONSTRUCTIONS = {'hilbert': hilbert_tour, 'greedy': greedy_edge_tour, 'mst': mst_tour}
+
+
+# Начальный обход из узлов эвристикой method
+def construct_tour(nodes, method):
+    coords = np.array([(node.x, node.y) for node in nodes], dtype=np.float64)
+    return [nodes[i] for i in CONSTRUCTIONS[method](coords).tolist()]
+
+
+# Локальный поиск 2-opt на участке обхода tour[lo:hi] (tour — массив индексов,
+# изменяется на месте). Концы tour[lo - 1] и tour[hi] остаются на своих местах.
+def two_opt_window(coords, tour, lo, hi, max_passes=5):
+    lo = max(lo, 1)
+    hi = min(hi, len(tour) - 1)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(lo, hi - 1):
+            a, b = coords[tour[i - 1]], coords[tour[i]]
+            js = np.arange(i + 1, hi)
+            c, d = coords[tour[js]], coords[tour[js + 1]]
+            delta = (np.hypot(*(c - a).T) + np.hypot(*(d - b).T)
+                     - np.hypot(*(b - a)) - np.hypot(*(d - c).T))
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                j = js[k]
+                tour[i:j + 1] = tour[i:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return tour
+
+
+# Обход целиком: можно улучшать начальные обходы из CONSTRUCTIONS
+def two_opt(coords, tour, max_passes=5):
+    return two_opt_window(coords, np.asarray(tour).copy(), 1, len(tour) - 1, max_passes)
+
+
+def spawn_seeds(seed, count):
+    return np.random.SeedSequence(seed).spawn(count)
+
+
+# Решатель кластера по умолчанию: жадное сопоставление рёбер и 2-opt.
+# Решатель получает координаты кластера (m, 2) и seed, возвращает порядок индексов.
+def greedy_two_opt(coords, seed):
+    return two_opt(coords, greedy_edge_tour(coords))
+
+
+# Решение одного кластера в рабочем процессе: решатель, затем 2-opt внутри кластера
+def _solve_cluster(solver, coords, seed):
+    if len(coords) <= 3:
+        return np.arange(len(coords))
+    return two_opt(coords, np.asarray(solver(coords, seed)))
+
+
+# Декомпозиция для больших задач: узлы делятся на пространственные кластеры
+# подряд идущими отрезками кривой Гильберта, каждый кластер решается отдельно
+# (параллельно в processes процессах) решателем solver(coords, seed) -> порядок
+# и улучшается 2-opt там же, в рабочем процессе. Кластеры обходятся в порядке
+# кривой, в основном процессе 2-opt проходит только окна вокруг стыков.
+# Память линейна по n: плотные матрицы есть только внутри кластера.
+class DecompositionSolver:
+    def __init__(self, nodes, cluster_size=200, solver=greedy_two_opt, processes=None, seed=None,
+                 repair_window=30, stats=None):
+        self.nodes = nodes
+        self.cluster_size = cluster_size
+        self.solver = solver
+        self.processes = processes
+        self.seed = seed
+        self.repair_window = repair_window
+        self.stats = stats or DISABLED_STATS
+
+    def solve(self):
+        coords = np.array([(node.x, node.y) for node in self.nodes], dtype=np.float64)
+        with self.stats.phase('clustering'):
+            order = hilbert_tour(coords)
+            clusters = [order[i:i + self.cluster_size] for i in range(0, len(order), self.cluster_size)]
+
+        with self.stats.phase('cluster_solving'):
+            local_orders = self.solve_clusters(coords, clusters)
+
+        with self.stats.phase('stitching'):
+            tour, boundaries = self.stitch(coords, clusters, local_orders)
+
+        with self.stats.phase('repair'):
+            w = self.repair_window
+            for boundary in boundaries:
+                two_opt_window(coords, tour, boundary - w, boundary + w)
+
+        return [self.nodes[i] for i in tour.tolist()]
+
+    def solve_clusters(self, coords, clusters):
+        seeds = spawn_seeds(self.seed, len(clusters))
+        cluster_coords = [coords[cluster] for cluster in clusters]
+        solvers = [self.solver] * len(clusters)
+        if self.processes == 1 or len(clusters) == 1:
+            return list(map(_solve_cluster, solvers, cluster_coords, seeds))
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            return list(executor.map(_solve_cluster, solvers, cluster_coords, seeds, chunksize=4))
+
+    # Каждый цикл кластера разрезается по одному ребру и проходится в одном из двух
+    # направлений; выбирается вариант с наименьшей ценой: вход от конца предыдущего
+    # кластера плюс выход к центру следующего минус длина выброшенного ребра
+    def stitch(self, coords, clusters, local_orders):
+        centroids = [coords[cluster].mean(axis=0) for cluster in clusters]
+        parts = []
+        boundaries = []
+        previous_end = None
+        position = 0
+        for k, (cluster, local_order) in enumerate(zip(clusters, local_orders)):
+            cycle = cluster[local_order]
+            points = coords[cycle]
+            following = np.roll(points, -1, axis=0)
+            removed = np.hypot(*(following - points).T)
+            if previous_end is None:
+                enter_here = enter_next = np.zeros(len(cycle))
+            else:
+                enter_here = np.hypot(*(points - previous_end).T)
+                enter_next = np.roll(enter_here, -1)
+            if k + 1 < len(clusters):
+                leave_here = np.hypot(*(points - centroids[k + 1]).T)
+                leave_next = np.roll(leave_here, -1)
+            else:
+                leave_here = leave_next = np.zeros(len(cycle))
+
+            # Вперёд: вход в cycle[i + 1], выход в cycle[i]; назад: вход в cycle[i], выход в cycle[i + 1]
+            forward = enter_next + leave_here - removed
+            backward = enter_here + leave_next - removed
+            i_forward, i_backward = int(np.argmin(forward)), int(np.argmin(backward))
+            if forward[i_forward] <= backward[i_backward]:
+                cycle = np.roll(cycle, -(i_forward + 1))
+            else:
+                cycle = np.roll(cycle, -i_backward)
+                cycle = np.concatenate([cycle[:1], cycle[1:][::-1]])
+
+            parts.append(cycle)
+            if position:
+                boundaries.append(position)
+            position += len(cycle)
+            previous_end = coords[cycle[-1]]
+        return np.concatenate(parts), boundaries
@@ -0,0 +1,35 @@
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+# Поток, в котором работает решатель: промежуточные результаты передаются в окно
+# не чаще чем раз в interval секунд, решение можно прервать через requestInterruption
+class SolverThread(QThread):
+    progress = pyqtSignal(list, float, int)
+    solved = pyqtSignal(list, float, int, bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, steps, interval=0.05):
+        super().__init__()
+        self.steps = steps
+        self.interval = interval
+
+    def run(self):
+        path, distance, iteration = [], 0.0, 0
+        last_emit = 0.0
+        # solved отправляется всегда, даже при ошибке решателя, чтобы окно разблокировало кнопки
+        error = None
+        try:
+            for path, distance, iteration in self.steps:
+                if self.isInterruptionRequested():
+                    break
+                now = time.monotonic()
+                if now - last_emit >= self.interval:
+                    self.progress.emit(list(path), float(distance), iteration)
+                    last_emit = now
+        except Exception as exception:
+            error = str(exception) or type(exception).__name__
+        self.steps.close()  # Прерванный решатель сразу узнаёт об остановке
+        self.solved.emit(list(path), float(distance), iteration, self.isInterruptionRequested())
+        if error is not None:
+            self.failed.emit(error)